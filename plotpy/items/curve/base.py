@@ -122,6 +122,8 @@ class CurveItem(QwtPlotCurve):
         self.immutable = True  # set to false to allow moving points around
         self._x = None
         self._y = None
+        # Incremented each time curve data is set or updated (see `get_data_version`)
+        self._data_version = 0
         self.update_params()
 
     def _get_visible_axis_min(self, axis_id: int, axis_data: np.ndarray) -> float:
@@ -371,6 +373,16 @@ class CurveItem(QwtPlotCurve):
         assert isinstance(self._x, np.ndarray) and isinstance(self._y, np.ndarray)
         return self._x, self._y
 
+    def get_data_version(self) -> int:
+        """Return curve data version, which is incremented each time curve data is
+        set or updated (including when arrays are modified in place and then passed
+        again to :py:meth:`set_data` or taken into account by :py:meth:`update_data`)
+
+        Returns:
+            Curve data version
+        """
+        return self._data_version
+
     def update_data(self) -> None:
         """Update curve data with current arrays."""
         if isinstance(self._x, np.ndarray) and isinstance(self._y, np.ndarray):
@@ -391,6 +403,7 @@ class CurveItem(QwtPlotCurve):
 
     def _setData(self, x: np.ndarray, y: np.ndarray) -> None:
         """Wrapper around QwtPlotCurve.setData() to handle downsampling"""
+        self._data_version += 1
         return super().setData(self.dsamp(x), self.dsamp(y))
 
     def set_data(self, x: np.ndarray, y: np.ndarray) -> None:
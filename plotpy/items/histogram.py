@@ -27,31 +27,136 @@ if TYPE_CHECKING:
     from plotpy.styles.base import ItemParameters
 
 
+def _uint_histogram(
+    data: np.ndarray,
+    nbins: int | np.ndarray,
+    drange: tuple[float, float] | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the histogram of unsigned integer data of 8 or 16 bits
+
+    Pixel values are counted with a single `np.bincount` pass, then the counts
+    are gathered into the requested bins: this gives the exact same result as
+    `np.histogram(data, bins=nbins, range=drange)`, while being much faster.
+
+    Args:
+        data: numpy array of unsigned integers (8 or 16 bits)
+        nbins: number of bins, or bin edges (see `np.histogram`)
+        drange: lower and upper range of the bins (see `np.histogram`)
+
+    Returns:
+        Tuple (hist, bins)
+    """
+    counts = np.bincount(data.ravel())
+    if drange is None:
+        nonzero = np.flatnonzero(counts)
+        if nonzero.size == 0:
+            return np.histogram(data, bins=nbins)
+        drange = (nonzero[0], nonzero[-1])
+    values = np.arange(counts.size)
+    return np.histogram(values, bins=nbins, range=drange, weights=counts)
+
+
 class HistDataSource:
     """An objects that provides an Histogram data source interface
     to a simple numpy array of data
+
+    Args:
+        data: numpy array
+        max_samples: if not None, maximum number of data samples used to compute
+         the histogram: bigger arrays are regularly subsampled, and counts are
+         scaled accordingly (this gives an approximate histogram, e.g. for an
+         interactive display of huge arrays). Default is None (exact histogram)
     """
 
     __implements__ = (IHistDataSource,)
 
-    def __init__(self, data: np.ndarray) -> None:
+    def __init__(self, data: np.ndarray, max_samples: int | None = None) -> None:
         self.data = data
+        self.max_samples = max_samples
+        self.histogram_cache = None
+        self._flat_cache = None
+        self._range_cache = None
+
+    def __get_flat_data(self) -> np.ndarray:
+        """Return data as a contiguous 1D array (a simple view on data if it is
+        already contiguous, which is kept for the next calls, or a temporary copy
+        which is not kept, to avoid doubling memory usage for large data)"""
+        cache = self._flat_cache
+        if cache is not None and cache[0] is self.data:
+            return cache[1]
+        data = self.data
+        flat = np.ravel(data)
+        if isinstance(data, np.ndarray) and np.may_share_memory(flat, data):
+            self._flat_cache = (data, flat)
+        else:
+            self._flat_cache = None
+        return flat
+
+    def __get_data_range(self) -> tuple[float, float]:
+        """Return data (min, max), computed only once for a given data array"""
+        cache = self._range_cache
+        if cache is None or cache[0] is not self.data:
+            flat = self.__get_flat_data()
+            cache = self._range_cache = (self.data, (flat.min(), flat.max()))
+        return cache[1]
 
     def get_histogram(
-        self, nbins: int, drange: tuple[float, float] | None = None
+        self, nbins: int | np.ndarray, drange: tuple[float, float] | None = None
     ) -> tuple[np.ndarray, np.ndarray]:
         """
         Return a tuple (hist, bins) where hist is a list of histogram values
 
         Args:
-            nbins: number of bins
+            nbins: number of bins, or bin edges (monotonically increasing array,
+             in which case `drange` is ignored)
             drange: lower and upper range of the bins. If not provided, range is
              simply (data.min(), data.max()). Values outside the range are ignored.
 
         Returns:
             Tuple (hist, bins)
+
+        .. note::
+
+            Result is cached for the last (nbins, drange) pair, so that changing
+            only the display options of the histogram (e.g. logarithmic scale)
+            does not require to scan the data again, and so is the data range
+            (used when `drange` is not provided): `data` is not supposed to be
+            modified in place.
         """
-        return np.histogram(self.data, bins=nbins, range=drange)
+        # With an integer number of bins, `np.histogram` already computes bin
+        # indices arithmetically and accumulates them with `np.bincount` (no
+        # `searchsorted` involved), while taking care of edge rounding issues:
+        # there is nothing to gain by reimplementing this here. With bin edges,
+        # it is also much faster than `np.searchsorted(edges, data)`.
+        # Bin edges arrays can neither be hashed nor compared as a whole: the cache
+        # key holds their values instead
+        with_edges = np.ndim(nbins) != 0
+        bins_key = tuple(np.ravel(nbins)) if with_edges else nbins
+        key = (bins_key, None if drange is None else tuple(drange), self.max_samples)
+        cache = self.histogram_cache
+        if cache is None or cache[0] is not self.data or cache[1] != key:
+            data = self.__get_flat_data()
+            stride = 1
+            if self.max_samples is not None and data.size > self.max_samples:
+                # Bins are computed on the full data range, so that bin edges are
+                # the same as for the exact histogram
+                if drange is None and not with_edges:
+                    drange = self.__get_data_range()
+                stride = -(-data.size // self.max_samples)
+                data = data[::stride]
+            if data.dtype in (np.uint8, np.uint16):
+                res = _uint_histogram(data, nbins, drange)
+            else:
+                if drange is None and data.size and not with_edges:
+                    # Same default range as `np.histogram`, but without scanning
+                    # data again when only the number of bins changes (range is
+                    # ignored by `np.histogram` when bin edges are given)
+                    drange = self.__get_data_range()
+                res = np.histogram(data, bins=nbins, range=drange)
+            if stride > 1:
+                res = (res[0] * stride, res[1])
+            cache = self.histogram_cache = (self.data, key, res)
+        return cache[2]
 
 
 assert_interfaces_valid(HistDataSource)
@@ -186,27 +291,46 @@ class HistogramItem(CurveItem):
         """
         return self.get_hist_source().get_histogram(self.bins, self.bin_range)
 
-    def update_histogram(self) -> None:
-        """Update histogram data"""
+    def update_histogram(self, replot: bool = True) -> None:
+        """Update histogram data
+
+        Args:
+            replot: if True (default), autoscale plot axes if histogram has changed
+             and replot. If False, the caller is responsible for it (e.g. to update
+             several histograms of the same plot at once)
+        """
         if self.get_hist_source() is None:
             return
         hist, bin_edges = self.compute_histogram()
-        # Duplicate the first `hist` value to get a step-like histogram:
-        hist = np.concatenate(([hist[0]], hist))
+        # Histogram sources return their cached arrays when neither data nor bins
+        # have changed: in that case, plot axes do not need to be rescaled
+        changed = (
+            hist is not self.hist_count
+            or bin_edges is not self.hist_bins
+            or self.logscale != self.old_logscale
+        )
+        hist_count = hist
+        hist = np.asarray(hist)
+        # Duplicate the first `hist` value to get a step-like histogram, filling
+        # a single output array (log scale is then computed in place):
+        ydata = np.empty(hist.size + 1, float if self.logscale else hist.dtype)
+        ydata[0] = hist[0]
+        ydata[1:] = hist
         if self.logscale:
-            hist = np.log(hist + 1)
-
-        self.set_data(bin_edges, hist)
-        # Autoscale only if logscale/bins have changed
-        if self.bins != self.old_bins or self.logscale != self.old_logscale:
-            if self.plot():
-                self.plot().do_autoscale()
-        self.old_bins = self.bins
-        self.old_logscale = self.logscale
+            np.log1p(ydata, out=ydata)
 
+        self.set_data(bin_edges, ydata)
         plot = self.plot()
         if plot is not None:
-            plot.do_autoscale(replot=True)
+            if changed:
+                self.hist_count, self.hist_bins = hist_count, bin_edges
+                self.old_bins, self.old_logscale = self.bins, self.logscale
+            if not replot:
+                return
+            if changed:
+                plot.do_autoscale(replot=True)
+            else:
+                plot.replot()
 
     def update_params(self):
         """Update histogram parameters"""
@@ -20,7 +20,7 @@ from guidata.dataset import update_dataset
 from guidata.utils.misc import assert_interfaces_valid
 from qtpy import QtCore as QC
 from qtpy import QtGui as QG
-from qwt import QwtPlotItem
+from qwt import QwtPlotItem, QwtSymbol
 
 from plotpy.config import CONF, _
 from plotpy.coords import canvas_to_axes
@@ -29,7 +29,7 @@ from plotpy.items.curve.base import CurveItem
 from plotpy.styles.label import LabelParam
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Hashable
 
     import guidata.io
     import qwt.scale_map
@@ -41,16 +41,39 @@ if TYPE_CHECKING:
     from plotpy.items import ImageItem, RectangleShape, XRangeSelection
     from plotpy.styles.base import ItemParameters
 
+#: Relative position of each anchor in a rectangle, as (x, y) factors
+ANCHOR_FACTORS = {
+    "TL": (0.0, 0.0),
+    "TR": (1.0, 0.0),
+    "BL": (0.0, 1.0),
+    "BR": (1.0, 1.0),
+    "L": (0.0, 0.5),
+    "R": (1.0, 0.5),
+    "T": (0.5, 0.0),
+    "B": (0.5, 1.0),
+    "C": (0.5, 0.5),
+}
+
+
+def get_anchor_position(anchor: str, rect: QRectF) -> tuple[float, float]:
+    """Return the position of an anchor in a rectangle
+
+    Args:
+        anchor: Anchor (one of the keys of `ANCHOR_FACTORS`)
+        rect: Rectangle
+
+    Returns:
+        tuple: Tuple with two elements: (x, y)
+    """
+    fx, fy = ANCHOR_FACTORS[anchor]
+    x1, y1, x2, y2 = rect.getCoords()
+    return x1 + fx * (x2 - x1), y1 + fy * (y2 - y1)
+
+
+# Kept for backward compatibility: prefer `get_anchor_position`
 ANCHORS = {
-    "TL": lambda r: (r.left(), r.top()),
-    "TR": lambda r: (r.right(), r.top()),
-    "BL": lambda r: (r.left(), r.bottom()),
-    "BR": lambda r: (r.right(), r.bottom()),
-    "L": lambda r: (r.left(), (r.top() + r.bottom()) / 2.0),
-    "R": lambda r: (r.right(), (r.top() + r.bottom()) / 2.0),
-    "T": lambda r: ((r.left() + r.right()) / 2.0, r.top()),
-    "B": lambda r: ((r.left() + r.right()) / 2.0, r.bottom()),
-    "C": lambda r: ((r.left() + r.right()) / 2.0, (r.top() + r.bottom()) / 2.0),
+    anchor: (lambda r, anchor=anchor: get_anchor_position(anchor, r))
+    for anchor in ANCHOR_FACTORS
 }
 
 
@@ -60,7 +83,7 @@ class AbstractLabelItem(QwtPlotItem):
     Draws a label on the canvas at position :
     G+C where G is a point in plot coordinates and C a point
     in canvas coordinates.
-    G can also be an anchor string as in ANCHORS in which case
+    G can also be an anchor string as in ANCHOR_FACTORS in which case
     the label will keep a fixed position wrt the canvas rect
 
     Args:
@@ -177,11 +200,8 @@ class AbstractLabelItem(QwtPlotItem):
         x0 += self.C[0]
         y0 += self.C[1]
 
-        rect = self.get_text_rect()
-        pos = ANCHORS[self.anchor](rect)
-        x0 -= pos[0]
-        y0 -= pos[1]
-        return x0, y0
+        dx, dy = get_anchor_position(self.anchor, self.get_text_rect())
+        return x0 - dx, y0 - dy
 
     def get_origin(
         self,
@@ -199,8 +219,8 @@ class AbstractLabelItem(QwtPlotItem):
         Returns:
             tuple: Tuple with two elements: (x, y)
         """
-        if self.G in ANCHORS:
-            return ANCHORS[self.G](canvasRect)
+        if self.G in ANCHOR_FACTORS:
+            return get_anchor_position(self.G, canvasRect)
         else:
             x0 = xMap.transform(self.G[0])
             y0 = yMap.transform(self.G[1])
@@ -373,15 +393,18 @@ class AbstractLabelItem(QwtPlotItem):
         plot = self.plot()
         if plot is None:
             return
-        rect = self.get_text_rect()
+        _x, _y, w, h = self.get_text_rect().getRect()
         canvasRect = plot.canvas().contentsRect()
+        # Scale maps are built once here and shared by the whole hit test (they are
+        # not cached across calls: they depend on axes scales and canvas geometry)
         xMap = plot.canvasMap(self.xAxis())
         yMap = plot.canvasMap(self.yAxis())
         x, y = self.get_top_left(xMap, yMap, canvasRect)
-        rct = QC.QRectF(x, y, rect.width(), rect.height())
-        inside = rct.contains(pos.x(), pos.y())
+        px, py = pos.x(), pos.y()
+        # Same as `QRectF(x, y, w, h).contains(px, py)`, without building the rect
+        inside = w > 0 and h > 0 and x <= px <= x + w and y <= py <= y + h
         if inside:
-            return self.click_inside(pos.x() - x, pos.y() - y)
+            return self.click_inside(px - x, py - y)
         else:
             return 1000.0, None, False, None
 
@@ -447,7 +470,7 @@ class AbstractLabelItem(QwtPlotItem):
         plot = self.plot()
         if plot is None:
             return
-        if self.G in ANCHORS or not self.labelparam.move_anchor:
+        if self.G in ANCHOR_FACTORS or not self.labelparam.move_anchor:
             # Move canvas offset
             lx, ly = self.C
             lx += new_pos.x() - old_pos.x()
@@ -476,7 +499,7 @@ class AbstractLabelItem(QwtPlotItem):
             delta_x: Translation in plot coordinates along x-axis
             delta_y: Translation in plot coordinates along y-axis
         """
-        if self.G in ANCHORS or not self.labelparam.move_anchor:
+        if self.G in ANCHOR_FACTORS or not self.labelparam.move_anchor:
             return
         lx0, ly0 = self.G
         lx1, ly1 = lx0 + delta_x, ly0 + delta_y
@@ -520,6 +543,11 @@ class LabelItem(AbstractLabelItem):
         self.text_string = "" if text is None else text
         self.text = QG.QTextDocument()
         self.marker: qwt.symbol.QwtSymbol | None = None
+        self._last_html: str | None = None
+        self._style_color: str | None = None
+        self._size_cache: QC.QSizeF | None = None
+        self._pen_color: str | None = None
+        self._pen_cache: QPen | None = None
         super().__init__(labelparam)
 
     def __reduce__(self) -> tuple[type, tuple]:
@@ -586,7 +614,12 @@ class LabelItem(AbstractLabelItem):
         """
         if text is not None:
             self.text_string = text
-        self.text.setHtml(f"<div>{self.text_string}</div>")
+        html = "<div>" + self.text_string + "</div>"
+        if html != self._last_html:
+            # Setting HTML contents triggers a (costly) text layout
+            self.text.setHtml(html)
+            self._last_html = html
+            self._size_cache = None
 
     def set_text_style(
         self, font: QG.QFont | None = None, color: str | None = None
@@ -597,19 +630,36 @@ class LabelItem(AbstractLabelItem):
             font: Font
             color: Color
         """
-        if font is not None:
+        changed = False
+        if font is not None and font != self.text.defaultFont():
             self.text.setDefaultFont(font)
-        if color is not None:
+            changed = True
+        if color is not None and color != self._style_color:
+            self._style_color = color
             self.text.setDefaultStyleSheet("div { color: %s; }" % color)
+            changed = True
+        if changed:
+            # Default style is applied when setting HTML contents: force it
+            self._last_html = None
         self.set_text()
 
+    def get_text_size(self) -> QC.QSizeF:
+        """Return the text size, computing the text layout only if needed
+
+        Returns:
+            Text size
+        """
+        if self._size_cache is None:
+            self._size_cache = self.text.size()
+        return self._size_cache
+
     def get_text_rect(self) -> QRectF:
         """Return the text rectangle
 
         Returns:
             Text rectangle
         """
-        sz = self.text.size()
+        sz = self.get_text_size()
         return QC.QRectF(0, 0, sz.width(), sz.height())
 
     def update_text(self) -> None:
@@ -633,13 +683,17 @@ class LabelItem(AbstractLabelItem):
         """
         self.update_text()
         x, y = self.get_top_left(xMap, yMap, canvasRect)
-        x0, y0 = self.get_origin(xMap, yMap, canvasRect)
-        painter.save()
-        self.marker.drawSymbols(painter, [QC.QPointF(x0, y0)])
-        painter.restore()
-        sz = self.text.size()
+        if self.marker.style() != QwtSymbol.NoSymbol:
+            x0, y0 = self.get_origin(xMap, yMap, canvasRect)
+            painter.save()
+            self.marker.drawSymbols(painter, [QC.QPointF(x0, y0)])
+            painter.restore()
+        sz = self.get_text_size()
         self.draw_frame(painter, int(x), int(y), int(sz.width()), int(sz.height()))
-        painter.setPen(QG.QPen(QG.QColor(self.labelparam.color)))
+        if self._pen_color != self.labelparam.color:
+            self._pen_color = self.labelparam.color
+            self._pen_cache = QG.QPen(QG.QColor(self._pen_color))
+        painter.setPen(self._pen_cache)
         painter.translate(x, y)
         self.text.drawContents(painter)
 
@@ -665,6 +719,11 @@ class LegendBoxItem(AbstractLabelItem):
     def __init__(self, labelparam: LabelParam = None) -> None:
         self.font = None
         self.color = None
+        self._legend_key = None
+        self._legend_cache = None
+        self._legend_curves = []
+        self._legend_texts: dict[str, QTextDocument] = {}
+        self._legend_y_starts = np.zeros(0)
         super().__init__(labelparam)
         # saves the last computed sizes
         self.sizes = 0.0, 0.0, 0.0, 0.0
@@ -688,18 +747,51 @@ class LegendBoxItem(AbstractLabelItem):
         """
         plot = self.plot()
         if plot is None:
-            return []
+            curves = []
+        else:
+            curves = [
+                item for item in plot.get_curve_items() if self.include_item(item)
+            ]
+        # Text documents are expensive to build (font metrics, stylesheet parsing,
+        # layout): they are rebuilt only when the legend contents have changed
+        key = tuple(
+            (
+                id(item),
+                item.param.label,
+                id(item.pen()),
+                id(item.brush()),
+                id(item.symbol()),
+            )
+            for item in curves
+        )
+        if key == self._legend_key:
+            return self._legend_cache
+        # Text documents only depend on curve labels (and text style): those of
+        # the previous legend are reused for unchanged labels
+        texts = {}
         text_items = []
-        for item in plot.get_items():
-            if not isinstance(item, CurveItem) or not self.include_item(item):
-                continue
-            text = QG.QTextDocument()
-            text.setDefaultFont(self.font)
-            text.setDefaultStyleSheet("div { color: %s; }" % self.color)
-            text.setHtml(f"<div>{item.param.label}</div>")
+        for item in curves:
+            label = item.param.label
+            text = texts.get(label, self._legend_texts.get(label))
+            if text is None:
+                text = QG.QTextDocument()
+                text.setDefaultFont(self.font)
+                text.setDefaultStyleSheet("div { color: %s; }" % self.color)
+                text.setHtml(f"<div>{label}</div>")
+            texts[label] = text
             text_items.append((text, item.pen(), item.brush(), item.symbol()))
+        self._legend_texts = texts
+        self._legend_key = key
+        self._legend_cache = text_items
+        self._legend_curves = curves
+        self.get_legend_size(text_items)
         return text_items
 
+    def invalidate_legend(self) -> None:
+        """Invalidate the cached legend items, forcing them to be rebuilt"""
+        self._legend_key = None
+        self._legend_cache = None
+
     def include_item(self, item: Any) -> bool:
         """Include item in legend box?
 
@@ -722,17 +814,23 @@ class LegendBoxItem(AbstractLabelItem):
         Returns:
             tuple: Tuple with four elements: (TW, TH, width, height)
         """
-        width = 0
-        height = 0
-        for text, _, _, _ in legenditems:  # noqa
+        nitems = len(legenditems)
+        widths = np.empty(nitems)
+        heights = np.empty(nitems)
+        for index, (text, _, _, _) in enumerate(legenditems):  # noqa
             sz = text.size()
-            if sz.width() > width:
-                width = sz.width()
-            if sz.height() > height:
-                height = sz.height()
+            widths[index] = sz.width()
+            heights[index] = sz.height()
+        width = float(widths.max()) if nitems else 0.0
+        height = float(heights.max()) if nitems else 0.0
 
         TW = LEGEND_SPACEH * 3 + LEGEND_WIDTH + width
-        TH = len(legenditems) * (height + LEGEND_SPACEV) + LEGEND_SPACEV
+        TH = nitems * (height + LEGEND_SPACEV) + LEGEND_SPACEV
+        # Vertical offset of each legend line with respect to the legend box top,
+        # followed by the legend box height (i.e. the end of the last line)
+        self._legend_y_starts = LEGEND_SPACEV + np.arange(nitems + 1) * (
+            height + LEGEND_SPACEV
+        )
         self.sizes = TW, TH, width, height
         return self.sizes
 
@@ -745,10 +843,19 @@ class LegendBoxItem(AbstractLabelItem):
             font: Font
             color: Color
         """
-        if font is not None:
+        if font is not None and font != self.font:
             self.font = font
-        if color is not None:
+            self._legend_texts = {}
+            self.invalidate_legend()
+        if color is not None and color != self.color:
             self.color = color
+            self._legend_texts = {}
+            self.invalidate_legend()
+
+    def invalidate_plot(self) -> None:
+        """Invalidate the plot to force a redraw"""
+        self.invalidate_legend()
+        super().invalidate_plot()
 
     def get_text_rect(self) -> QC.QRectF:
         """Return the text rectangle
@@ -756,8 +863,8 @@ class LegendBoxItem(AbstractLabelItem):
         Returns:
             Text rectangle
         """
-        items = self.get_legend_items()
-        TW, TH, _width, _height = self.get_legend_size(items)
+        self.get_legend_items()
+        TW, TH, _width, _height = self.sizes
         return QC.QRectF(0.0, 0.0, TW, TH)
 
     def draw(
@@ -776,28 +883,29 @@ class LegendBoxItem(AbstractLabelItem):
             canvasRect: Canvas rectangle
         """
         items = self.get_legend_items()
-        TW, TH, _width, height = self.get_legend_size(items)
+        TW, TH, _width, height = self.sizes
 
         x, y = self.get_top_left(xMap, yMap, canvasRect)
         self.draw_frame(painter, int(x), int(y), int(TW), int(TH))
 
-        y0 = int(y + LEGEND_SPACEV)
+        # Loop invariants: sample line ends, symbol and text abscissas
         x0 = int(x + LEGEND_SPACEH)
-        for text, ipen, ibrush, isymbol in items:
-            isymbol.drawSymbols(
-                painter, [QC.QPointF(x0 + LEGEND_WIDTH / 2, y0 + height / 2)]
-            )
+        x0_end = x0 + LEGEND_WIDTH
+        xsymbol = x0 + LEGEND_WIDTH / 2
+        x1 = x0 + LEGEND_SPACEH + LEGEND_WIDTH
+        half_height = height / 2
+        for (text, ipen, ibrush, isymbol), dy in zip(items, self._legend_y_starts):
+            y0 = y + dy
+            ymid = y0 + half_height
+            isymbol.drawSymbols(painter, [QC.QPointF(xsymbol, ymid)])
             painter.save()
             painter.setPen(ipen)
             painter.setBrush(ibrush)
-            painter.drawLine(
-                x0, int(y0 + height / 2), int(x0 + LEGEND_WIDTH), int(y0 + height / 2)
-            )
-            x1 = x0 + LEGEND_SPACEH + LEGEND_WIDTH
+            yline = int(ymid)
+            painter.drawLine(x0, yline, x0_end, yline)
             painter.translate(x1, y0)
             text.drawContents(painter)
             painter.restore()
-            y0 += height + LEGEND_SPACEV
 
     def click_inside(self, locx: float, locy: float) -> tuple[float, float, bool, type]:
         """Called when the mouse button is clicked inside the object
@@ -811,17 +919,12 @@ class LegendBoxItem(AbstractLabelItem):
              other_object).
         """
         # hit_test already called get_text_rect for us...
-        _TW, _TH, _width, height = self.sizes
-        line = (locy - LEGEND_SPACEV) / (height + LEGEND_SPACEV)
-        line = int(line)
+        y_starts = self._legend_y_starts
+        line = max(int(y_starts.searchsorted(locy, side="right")) - 1, 0)
         if LEGEND_SPACEH <= locx <= (LEGEND_WIDTH + LEGEND_SPACEH):
             # We hit a legend line, select the corresponding curve
             # and do as if we weren't hit...
-            items = [
-                item
-                for item in self.plot().get_items()
-                if self.include_item(item) and isinstance(item, CurveItem)
-            ]
+            items = self._legend_curves
             if line < len(items):
                 return 1000.0, None, False, items[line]
         return 2.0, 1, True, None
@@ -873,6 +976,8 @@ class SelectedLegendBoxItem(LegendBoxItem):
     ) -> None:
         super().__init__(dataset)
         self.itemlist = [] if itemlist is None else itemlist
+        # Set of item ids, for constant-time membership test in `include_item`
+        self._itemids = {id(item) for item in self.itemlist}
 
     def __reduce__(self) -> tuple[type, tuple]:
         """Return a tuple containing the constructor and its arguments"""
@@ -888,7 +993,7 @@ class SelectedLegendBoxItem(LegendBoxItem):
         Returns:
             True if item is included, False otherwise
         """
-        return LegendBoxItem.include_item(self, item) and item in self.itemlist
+        return LegendBoxItem.include_item(self, item) and id(item) in self._itemids
 
     def add_item(self, item: Any) -> None:
         """Add item
@@ -897,6 +1002,16 @@ class SelectedLegendBoxItem(LegendBoxItem):
             item: Item
         """
         self.itemlist.append(item)
+        self._itemids.add(id(item))
+
+    def remove_item(self, item: Any) -> None:
+        """Remove item
+
+        Args:
+            item: Item
+        """
+        self.itemlist.remove(item)
+        self._itemids.discard(id(item))
 
 
 class ObjectInfo:
@@ -906,6 +1021,15 @@ class ObjectInfo:
         """Return the text to be displayed"""
         return ""
 
+    def get_cache_key(self) -> Hashable | None:
+        """Return a key identifying the state on which the text depends
+
+        Returns:
+            Key which is equal to the previous one only if the text has not changed,
+            or None if the text has to be recomputed every time (default)
+        """
+        return None
+
 
 class RangeInfo(ObjectInfo):
     """ObjectInfo handling XRangeSelection shape informations: x, dx
@@ -939,6 +1063,10 @@ class RangeInfo(ObjectInfo):
 
         self.func = function
 
+    def get_cache_key(self) -> tuple:
+        """Return a key identifying the state on which the text depends"""
+        return self.label, self.func, self.range.get_range()
+
     def get_text(self) -> str:
         """Return the text to be displayed"""
         x0, x1 = self.range.get_range()
@@ -947,6 +1075,29 @@ class RangeInfo(ObjectInfo):
         return self.label % self.func(x, dx)
 
 
+# Vector passed to `RangeComputation` functions when range is empty (read-only,
+# as it is shared between all calls)
+EMPTY_RANGE_VECTOR = np.array([np.nan])
+EMPTY_RANGE_VECTOR.flags.writeable = False
+
+
+def get_range_indices(x: np.ndarray, x0: float, x1: float) -> tuple[int, int]:
+    """Return the indices delimiting the [x0, x1] range in a sorted array
+
+    Args:
+        x: Sorted array
+        x0: First bound of the range
+        x1: Second bound of the range
+
+    Returns:
+        tuple: Tuple with two elements: (i0, i1), with i0 <= i1
+    """
+    i0, i1 = x.searchsorted((x0, x1)).tolist()
+    if i0 > i1:
+        return i1, i0
+    return i0, i1
+
+
 class RangeComputation(ObjectInfo):
     """ObjectInfo showing curve computations relative to a XRangeSelection
     shape
@@ -984,21 +1135,35 @@ class RangeComputation(ObjectInfo):
         """
         self.curve = curve
 
+    def get_cache_key(self) -> tuple:
+        """Return a key identifying the state on which the text depends
+
+        .. note::
+
+            Curve data is identified by its version (see
+            :py:meth:`.CurveItem.get_data_version`): if data arrays are modified in
+            place, the text is updated only after calling the curve `set_data` or
+            `update_data` method.
+        """
+        return (
+            self.label,
+            self.func,
+            self.range.get_range(),
+            self.curve,
+            self.curve.get_data_version(),
+        )
+
     def get_text(self) -> str:
         """Return the text to be displayed"""
         x0, x1 = self.range.get_range()
         data = self.curve.get_data()
-        X = data[0]
-        i0 = X.searchsorted(x0)
-        i1 = X.searchsorted(x1)
-        if i0 > i1:
-            i0, i1 = i1, i0
+        i0, i1 = get_range_indices(data[0], x0, x1)
         vectors = []
         for vector in data:
             if vector is None:
                 vectors.append(None)
             elif i0 == i1:
-                vectors.append(np.array([np.nan]))
+                vectors.append(EMPTY_RANGE_VECTOR)
             else:
                 vectors.append(vector[i0:i1])
         return self.label % self.func(*vectors)
@@ -1013,6 +1178,13 @@ class RangeComputation2d(ObjectInfo):
         rect: Rectangular area
         function: input arguments are x, y, z arrays (extraction of arrays
          corresponding to the rectangular area)
+
+    .. note::
+
+        The z array is a view on the image data (no copy is made), and the function
+        is called as is: for large areas, it should rely on vectorized reductions
+        (e.g. NumPy's `mean`, `min`, `max`) or on a compiled callable (e.g. a Numba
+        `njit` function) rather than on Python loops over pixels.
     """
 
     def __init__(
@@ -1048,6 +1220,7 @@ class DataInfoLabel(LabelItem):
         if isinstance(infos, ObjectInfo):
             infos = [infos]
         self.infos = infos
+        self._infos_cache_key = None
 
     def __reduce__(self) -> tuple[type, tuple]:
         """Return a tuple containing the constructor and its arguments"""
@@ -1064,11 +1237,17 @@ class DataInfoLabel(LabelItem):
 
     def update_text(self):
         """Update text"""
+        # Infos which are not `ObjectInfo` instances (e.g. annotated shapes) do not
+        # provide any cache key: text is always recomputed for those
+        keys = tuple(
+            info.get_cache_key() if isinstance(info, ObjectInfo) else None
+            for info in self.infos
+        )
+        key = None if None in keys else (self.labelparam.label, keys)
+        if key is not None and key == self._infos_cache_key:
+            return
+        self._infos_cache_key = key
         title = self.labelparam.label
-        if title:
-            text = ["<b>%s</b>" % title]
-        else:
-            text = []
-        for info in self.infos:
-            text.append(info.get_text())
+        text = ["<b>%s</b>" % title] if title else []
+        text.extend(info.get_text() for info in self.infos)
         self.set_text("<br/>".join(text))
@@ -21,6 +21,7 @@ The following functions are available:
 * :py:func:`.build_icon_from_cmap`: build an icon representing the colormap
 * :py:func:`.build_icon_from_cmap_name`: build an icon representing the colormap
   from its name
+* :py:func:`.prebuild_all_icons`: build icons of all colormaps in advance
 
 Reference
 ^^^^^^^^^
@@ -30,13 +31,16 @@ Reference
 .. autofunction:: add_cmap
 .. autofunction:: build_icon_from_cmap
 .. autofunction:: build_icon_from_cmap_name
+.. autofunction:: prebuild_all_icons
 """
 
 from __future__ import annotations
 
+import functools
 import json
 import os
-from typing import Dict, Literal, Sequence
+from collections import UserDict
+from typing import Literal, MutableMapping, Sequence
 
 import numpy as np
 import qtpy.QtCore as QC
@@ -51,7 +55,51 @@ FULLRANGE = QwtInterval(0.0, 1.0)
 SMALL_ICON_WIDTH, SMALL_ICON_HEIGHT, SMALL_ICON_ORIENTATION = 16, 7, "h"
 LARGE_ICON_WIDTH, LARGE_ICON_HEIGHT, LARGE_ICON_ORIENTATION = 80, 16, "h"
 
-CmapDictType = Dict[str, EditableColormap]
+# Colormap icons built from colormap names: (name, width, height, orientation, margin)
+# -> (color table, icon)
+ICON_CACHE: dict[tuple[str, int, int, str, int], tuple[list[int], QG.QIcon]] = {}
+
+CmapDictType = MutableMapping[str, EditableColormap]
+
+
+class RawColormap:
+    """Raw colormap definition, converted to a colormap object only when needed
+
+    Args:
+        name: colormap name
+        iterable: sequence of tuples composed of a float position and a hex color
+         string (see :py:meth:`.EditableColormap.from_iterable`)
+    """
+
+    __slots__ = ("name", "iterable", "__cmap")
+
+    def __init__(self, name: str, iterable: Sequence[tuple[float, str]]) -> None:
+        self.name = name
+        self.iterable = iterable
+        self.__cmap: EditableColormap | None = None
+
+    def get_cmap(self) -> EditableColormap:
+        """Returns the colormap object, building it on first call
+
+        Returns:
+            Colormap object (always the same instance)
+        """
+        if self.__cmap is None:
+            self.__cmap = EditableColormap.from_iterable(self.iterable, name=self.name)
+        return self.__cmap
+
+
+class LazyColormapDict(UserDict):
+    """Colormaps dictionary (names -> colormaps) in which colormaps may be stored
+    as :py:class:`.RawColormap` instances: those are converted to colormap objects
+    when accessed for the first time, so that loading colormaps at import is cheap.
+    """
+
+    def __getitem__(self, key: str) -> EditableColormap:
+        value = self.data[key]
+        if isinstance(value, RawColormap):
+            value = self.data[key] = value.get_cmap()
+        return value
 
 
 def load_raw_colormaps_from_json(
@@ -79,7 +127,8 @@ def load_raw_colormaps_from_json(
 
 def load_qwt_colormaps_from_json(json_path: str) -> CmapDictType:
     """Same as function load_raw_colormaps_from_json but transforms the raw colormaps
-    into CustomQwtLinearColormap objects that are used by plotpy.
+    into CustomQwtLinearColormap objects that are used by plotpy. Colormap objects are
+    built lazily, on first access (see :py:class:`.LazyColormapDict`).
 
     Args:
         json_path: absolute path to the json to open. If file is not found, returns an
@@ -88,10 +137,12 @@ def load_qwt_colormaps_from_json(json_path: str) -> CmapDictType:
     Returns:
         Dictionnary of colormpas names -> CustomQwtLinearColormap
     """
-    return {
-        name.lower(): EditableColormap.from_iterable(iterable, name=name)
-        for name, iterable in load_raw_colormaps_from_json(json_path).items()
-    }
+    return LazyColormapDict(
+        {
+            name.lower(): RawColormap(name, iterable)
+            for name, iterable in load_raw_colormaps_from_json(json_path).items()
+        }
+    )
 
 
 def get_cmap_path(config_path: str):
@@ -145,7 +196,10 @@ DEFAULT_COLORMAPS: CmapDictType = load_qwt_colormaps_from_json(DEFAULT_COLORMAPS
 CUSTOM_COLORMAPS: CmapDictType = load_qwt_colormaps_from_json(CUSTOM_COLORMAPS_PATH)
 
 # Merge default and custom colormaps into a single dictionnary to simplify access
-ALL_COLORMAPS: CmapDictType = {**DEFAULT_COLORMAPS, **CUSTOM_COLORMAPS}
+# (raw colormaps are shared, so that each colormap is built only once)
+ALL_COLORMAPS: CmapDictType = LazyColormapDict(
+    {**DEFAULT_COLORMAPS.data, **CUSTOM_COLORMAPS.data}
+)
 
 # Default colormap to use if a colormap is not found
 DEFAULT = ALL_COLORMAPS["jet"]
@@ -165,6 +219,21 @@ def save_colormaps(json_filename: str, colormaps: CmapDictType):
         json.dump(raw_colormaps, f, indent=4)
 
 
+@functools.lru_cache(maxsize=16)
+def _get_icon_line(length: int) -> np.ndarray:
+    """Returns the (read-only) line of color table indexes used to build icons
+
+    Args:
+        length: line length
+
+    Returns:
+        Line of `length` indexes, from 0 to 255
+    """
+    line = np.linspace(0, 255, length).astype(np.uint8)
+    line.flags.writeable = False
+    return line
+
+
 def build_icon_from_cmap(
     cmap: EditableColormap,
     width: int = SMALL_ICON_WIDTH,
@@ -189,17 +258,17 @@ def build_icon_from_cmap(
     padded_width = width - 2 * margin
     padded_height = height - 2 * margin
 
-    data = np.zeros((padded_height, padded_width), np.uint8)
-
     if orientation == "h":
-        line = np.linspace(0, 255, padded_width)
-        data[:, :] = line[:]
+        line = _get_icon_line(padded_width)
     else:
-        line = np.linspace(0, 255, padded_height)
-        data[:, :] = line[:, np.newaxis]
+        line = _get_icon_line(padded_height)[:, np.newaxis]
+    # ARGB32 colors are directly looked up in the color table (instead of building
+    # an indexed image which would be converted by Qt), and the result is written
+    # once in the contiguous buffer required by QImage
+    colors = np.array(cmap.colorTable(FULLRANGE), dtype=np.uint32)[line]
+    data = np.broadcast_to(colors, (padded_height, padded_width)).copy()
 
     img = toQImage(data)
-    img.setColorTable(cmap.colorTable(FULLRANGE))
     cm_pxmap = QG.QPixmap.fromImage(img)
 
     if margin == 0:
@@ -226,7 +295,8 @@ def build_icon_from_cmap_name(
     margin: int = 0,
 ) -> QG.QIcon:
     """Builds an QIcon representing the colormap from the colormap name found in
-    ALL_COLORMAPS global variable.
+    ALL_COLORMAPS global variable. Icons are cached (for each name and size) and
+    rebuilt only if the colormap has changed.
 
     Args:
         cmap_name: colormap name to search in ALL_COLORMAPS
@@ -242,9 +312,38 @@ def build_icon_from_cmap_name(
     Returns:
         QIcon representing the colormap
     """
-    return build_icon_from_cmap(
-        get_cmap(cmap_name.lower()), width, height, orientation, margin
-    )
+    cmap = get_cmap(cmap_name.lower())
+    table = cmap.colorTable(FULLRANGE)
+    key = (cmap.name.lower(), width, height, orientation, margin)
+    cached = ICON_CACHE.get(key)
+    if cached is None or cached[0] != table:
+        cached = ICON_CACHE[key] = (
+            table,
+            build_icon_from_cmap(cmap, width, height, orientation, margin),
+        )
+    return cached[1]
+
+
+def prebuild_all_icons(
+    width: int = SMALL_ICON_WIDTH,
+    height: int = SMALL_ICON_HEIGHT,
+    orientation: Literal["h", "v"] = SMALL_ICON_ORIENTATION,
+    margin: int = 0,
+) -> None:
+    """Builds the icons of all colormaps found in ALL_COLORMAPS global variable, so
+    that subsequent calls to :py:func:`.build_icon_from_cmap_name` with the same
+    arguments (e.g. when populating a colormap combo box) only return cached icons.
+
+    Args:
+        width: icon width
+        height: icon height
+        orientation: orientation of the colormap in the icon. Can be "h" for horizontal
+         or "v" for vertical
+        margin: margin around the colormap in the icon (see
+         :py:func:`.build_icon_from_cmap`)
+    """
+    for cmap_name in ALL_COLORMAPS:
+        build_icon_from_cmap_name(cmap_name, width, height, orientation, margin)
 
 
 def get_cmap(cmap_name: str) -> EditableColormap:
@@ -299,4 +398,6 @@ def delete_cmap(cmap: EditableColormap) -> None:
     global ALL_COLORMAPS, CUSTOM_COLORMAPS
     if CUSTOM_COLORMAPS.pop(cmap.name.lower(), None) is not None:
         del ALL_COLORMAPS[cmap.name.lower()]
+        for key in [key for key in ICON_CACHE if key[0] == cmap.name.lower()]:
+            del ICON_CACHE[key]
         save_colormaps(CUSTOM_COLORMAPS_PATH, CUSTOM_COLORMAPS)
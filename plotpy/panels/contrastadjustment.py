@@ -17,6 +17,7 @@ histogram and allows to manipulate it in order to adjust the image contrast.
 
 from __future__ import annotations
 
+from collections import defaultdict
 from typing import TYPE_CHECKING
 
 import numpy as np
@@ -68,8 +69,9 @@ class LevelsHistogram(BasePlot):
         )
         self.antialiased = False
 
-        # a dict of dict : plot -> selected items -> HistogramItem
-        self._tracked_items: dict[BasePlot, dict[BaseImageItem, HistogramItem]] = {}
+        # selected items -> (plot, HistogramItem), and plot -> selected items
+        self._tracked_items: dict[BaseImageItem, tuple[BasePlot, HistogramItem]] = {}
+        self._plot_items: defaultdict[BasePlot, set[BaseImageItem]] = defaultdict(set)
         self.param = CurveParam(_("Curve"), icon="curve.png")
         self.param.read_config(CONF, "histogram", "curve")
 
@@ -110,23 +112,20 @@ class LevelsHistogram(BasePlot):
         self,
     ) -> Generator[tuple[BaseImageItem, HistogramItem], None, None]:
         """Generator of tracked items"""
-        for _plot, items in list(self._tracked_items.items()):
-            for item_curve_tuple in list(items.items()):
-                yield item_curve_tuple  # tuple item,curve
+        for item, (_plot, curve) in self._tracked_items.items():
+            yield item, curve
 
-    def __del_known_items(self, known_items: dict, items: list) -> None:
-        """Delete known items
+    def __del_known_items(self, plot: BasePlot, items: list) -> None:
+        """Delete known items of plot which are not in items
 
         Args:
-            known_items: dict of known items
-            items: list of items to delete
+            plot: plot whose known items are to be deleted
+            items: list of items to keep
         """
-        del_curves = []
-        for item in list(known_items.keys()):
-            if item not in items:
-                curve = known_items.pop(item)
-                del_curves.append(curve)
-        self.del_items(del_curves)
+        known_items = self._plot_items[plot]
+        del_items = known_items.difference(items)
+        known_items.difference_update(del_items)
+        self.del_items([self._tracked_items.pop(item)[1] for item in del_items])
 
     def selection_changed(self, plot: BasePlot) -> None:
         """Selection changed callback
@@ -137,25 +136,24 @@ class LevelsHistogram(BasePlot):
         items: list[BaseImageItem] = plot.get_selected_items(
             item_type=IVoiImageItemType
         )
-        known_items = self._tracked_items.setdefault(plot, {})
+        known_items = self._plot_items[plot]
 
         if items:
-            self.__del_known_items(known_items, items)
+            self.__del_known_items(plot, items)
             if len(items) == 1:
                 # Removing any cached item for other plots
-                for other_plot, _items in list(self._tracked_items.items()):
+                for other_plot in self._plot_items:
                     if other_plot is not plot:
                         if not other_plot.get_selected_items(
                             item_type=IVoiImageItemType
                         ):
-                            other_known_items = self._tracked_items[other_plot]
-                            self.__del_known_items(other_known_items, [])
+                            self.__del_known_items(other_plot, [])
         else:
             # if all items are deselected we keep the last known
             # selection (for one plot only)
-            for other_plot, _items in list(self._tracked_items.items()):
+            for other_plot in self._plot_items:
                 if other_plot.get_selected_items(item_type=IVoiImageItemType):
-                    self.__del_known_items(known_items, [])
+                    self.__del_known_items(plot, [])
                     break
 
         for item in items:
@@ -166,9 +164,10 @@ class LevelsHistogram(BasePlot):
                 curve = HistogramItem(self.param, histparam, keep_weakref=True)
                 curve.set_hist_source(item)
                 self.add_item(curve, z=0)
-                known_items[item] = curve
+                known_items.add(item)
+                self._tracked_items[item] = (plot, curve)
 
-        nb_selected = len(list(self.tracked_items_gen()))
+        nb_selected = len(self._tracked_items)
         if not nb_selected:
             self.replot()
             return
@@ -187,14 +186,16 @@ class LevelsHistogram(BasePlot):
                 curve.histparam.bin_max = None
                 curve.histparam.n_bins = self.DEFAULT_NBINS
             self.param.update_item(curve)
-            curve.histparam.update_hist(curve)
+            curve.histparam.update_hist(curve, replot=False)
+        # Autoscaling once for all histograms
+        self.do_autoscale(replot=False)
 
         self.active_item_changed(plot)
 
         # Rescaling histogram plot axes for better visibility
         ymax = None
         for item in known_items:
-            curve = known_items[item]
+            _plot, curve = self._tracked_items[item]
             _x, y = curve.get_data()
             ymax0 = y.mean() + 3 * y.std()
             if ymax is None or ymax0 > ymax:
@@ -202,7 +203,7 @@ class LevelsHistogram(BasePlot):
         ymin, _ymax = self.get_axis_limits("left")
         if ymax is not None:
             self.set_axis_limits("left", ymin, ymax)
-            self.replot()
+        self.replot()
 
     def item_removed(self, item: BaseImageItem) -> None:
         """Item removed callback
@@ -210,17 +211,13 @@ class LevelsHistogram(BasePlot):
         Args:
             item: item which was removed
         """
-        replot = False
-        for _plot, items_dict in list(self._tracked_items.items()):
-            if item in items_dict:
-                try:
-                    self.del_item(items_dict[item])
-                    replot = True
-                except ValueError:
-                    pass  # Histogram has not yet been created
-                items_dict.pop(item)
-                break
-        if replot:
+        if item in self._tracked_items:
+            plot, curve = self._tracked_items.pop(item)
+            self._plot_items[plot].discard(item)
+            try:
+                self.del_item(curve)
+            except ValueError:
+                return  # Histogram has not yet been created
             self.replot()
 
     def active_item_changed(self, plot: BasePlot) -> None:
@@ -239,11 +236,11 @@ class LevelsHistogram(BasePlot):
         else:
             active_range = None
 
-        multiple_ranges = False
-        for item, curve in self.tracked_items_gen():
-            if active_range != item.get_lut_range():
-                multiple_ranges = True
         if active_range is not None:
+            multiple_ranges = any(
+                item.get_lut_range() != active_range
+                for item, _curve in self.tracked_items_gen()
+            )
             _m, _M = active_range
             self.set_range_style(multiple_ranges)
             self.range.set_range(_m, _M, dosignal=False)
@@ -266,10 +263,14 @@ class LevelsHistogram(BasePlot):
             multiple_ranges: whether multiple ranges are selected
         """
         if multiple_ranges:
-            self.range.shapeparam.sel_line.color = self.range_multi_color
+            color = self.range_multi_color
         else:
-            self.range.shapeparam.sel_line.color = self.range_mono_color
-        self.range.shapeparam.update_item(self.range)
+            color = self.range_mono_color
+        # This is called for each range change (e.g. when dragging the range
+        # selection): pens and symbols are rebuilt only if the style has changed
+        if self.range.shapeparam.sel_line.color != color:
+            self.range.shapeparam.sel_line.color = color
+            self.range.shapeparam.update_item(self.range)
 
     def set_range(self, zmin: float, zmax: float) -> bool:
         """Set range
@@ -377,14 +378,17 @@ class LevelsHistogram(BasePlot):
             *args: arguments to pass to function
             **kwargs: keyword arguments to pass to function
         """
-        item = None
-        zmin, zmax = np.inf, -np.inf
-        for item, curve in self.tracked_items_gen():
-            zmin_i, zmax_i = func(item, curve, *args, **kwargs)
-            zmin = min(zmin, zmin_i)
-            zmax = max(zmax, zmax_i)
-        if zmin != np.inf and zmax != -np.inf:
-            self.set_range(zmin, zmax)
+        ranges = np.array(
+            [
+                func(item, curve, *args, **kwargs)
+                for item, curve in self.tracked_items_gen()
+            ],
+            dtype=float,
+        ).reshape(-1, 2)
+        if ranges.size:
+            # NaN ranges (e.g. images without any finite value) are ignored:
+            zmin, zmax = np.fmin.reduce(ranges[:, 0]), np.fmax.reduce(ranges[:, 1])
+            self.set_range(float(zmin), float(zmax))
 
     def set_full_range(self) -> None:
         """Set range bounds to image min/max levels"""
@@ -352,6 +352,8 @@ class BasePlot(qwt.QwtPlot):
         self.plot_id = None  # id assigned by it's manager
         self.filter = StatefulEventFilter(self)
         self.items: list[itf.IBasePlotItem] = []
+        # Curve items, in the same order as in `items` (see `get_curve_items`)
+        self._curve_items: list[CurveItem] = []
         self.active_item: qwt.QwtPlotItem = None
         self.last_selected = {}  # a mapping from item type to last selected item
         self.axes_styles = [
@@ -1141,6 +1143,17 @@ class BasePlot(qwt.QwtPlot):
             assert issubclass(item_type, itf.IItemType)
             return [item for item in items if item_type in item.types()]
 
+    def get_curve_items(self) -> list[CurveItem]:
+        """Return widget's curve item list, in the same order as in `get_items`
+
+        This is faster than filtering the whole item list, as curve items are
+        tracked when items are added to or removed from the widget.
+
+        Returns:
+            list[CurveItem]: the curve item list (must not be modified)
+        """
+        return self._curve_items
+
     def get_public_items(
         self, z_sorted: bool = False, item_type: itf.IBasePlotItem | None = None
     ) -> list[itf.IBasePlotItem]:
@@ -1275,6 +1288,8 @@ class BasePlot(qwt.QwtPlot):
             )
         else:
             self.items.append(item)
+            if isinstance(item, CurveItem):
+                self._curve_items.append(item)
 
             # PlotType handling when adding the first CurveItem or ImageItem
             if (
@@ -1357,6 +1372,8 @@ class BasePlot(qwt.QwtPlot):
             item.detach()
             # raises ValueError if item not in list
             self.items.remove(item)
+            if isinstance(item, CurveItem):
+                self._curve_items.remove(item)
             self.__clean_item_references(item)
             self.SIG_ITEM_REMOVED.emit(item)
         self.SIG_ITEMS_CHANGED.emit(self)
@@ -39,11 +39,13 @@ class HistogramParam(DataSet):
         self.bin_min, self.bin_max = item.get_bin_range()
         self.logscale = item.get_logscale()
 
-    def update_hist(self, item: HistogramItem) -> None:
+    def update_hist(self, item: HistogramItem, replot: bool = True) -> None:
         """Update the histogram plot item from the parameters
 
         Args:
             item: Histogram item
+            replot: if True (default), autoscale and replot the item plot
+             (see :py:meth:`.HistogramItem.update_histogram`)
         """
         if self.bin_min is None or self.bin_max is None:
             item.bin_range = None
@@ -51,7 +53,7 @@ class HistogramParam(DataSet):
             item.bin_range = (self.bin_min, self.bin_max)
         item.bins = self.n_bins
         item.logscale = self.logscale
-        item.update_histogram()
+        item.update_histogram(replot=replot)
 
 
 class Histogram2DParam(BaseImageParam):
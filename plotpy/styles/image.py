@@ -53,7 +53,8 @@ def _create_choices(
 ) -> list[tuple[str, str, Callable[[str], QG.QIcon]]]:
     """Create the list of choices for the colormap item."""
     choices: list[tuple[str, str, Callable[[str], QG.QIcon]]] = []
-    for cmap in ALL_COLORMAPS.values():
+    # Raw colormaps also have a name: colormaps are not built just to list them
+    for cmap in ALL_COLORMAPS.data.values():
         choices.append(
             (
                 cmap.name,
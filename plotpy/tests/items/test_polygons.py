@@ -25,17 +25,25 @@ NSEGMIN = 4
 NSEGMAX = 300
 
 
-def create_circle():
-    x, y, rmax = np.random.rand(3)
+def create_circles(ncirc):
+    """Return points and offsets of `ncirc` tesselated circles"""
+    x, y, rmax = np.random.rand(3, ncirc)
     rmax *= RMAX
     x *= XMAX
     y *= YMAX
-    nseg = np.random.randint(NSEGMIN, NSEGMAX)
-    th = np.linspace(0, 2 * np.pi, nseg)
-    PTS = np.empty((nseg, 2), float)
-    PTS[:, 0] = x + rmax * np.cos(th)
-    PTS[:, 1] = y + rmax * np.sin(th)
-    return PTS
+    nseg = np.random.randint(NSEGMIN, NSEGMAX, ncirc)
+    starts = np.cumsum(nseg) - nseg
+    # Circle index and point index within the circle, for each point
+    icirc = np.repeat(np.arange(ncirc), nseg)
+    ipt = np.arange(nseg.sum()) - starts[icirc]
+    th = 2 * np.pi * ipt / (nseg - 1)[icirc]
+    pts = np.empty((th.size, 2), float)
+    pts[:, 0] = x[icirc] + rmax[icirc] * np.cos(th)
+    pts[:, 1] = y[icirc] + rmax[icirc] * np.sin(th)
+    offsets = np.empty((ncirc, 2), np.int32)
+    offsets[:, 0] = np.arange(ncirc)
+    offsets[:, 1] = starts
+    return pts, offsets
 
 
 NCIRC = 1000
@@ -45,6 +53,7 @@ COLORS = [
     (0xFF000000, 0x80FF0000),
     (0xFF00FF00, 0x80000000),
 ]
+COLOR_TABLE = np.array(COLORS, dtype=np.uint32)
 
 
 def test_polygons():
@@ -63,19 +72,11 @@ def test_polygons():
         plot.set_axis_title("bottom", "Lon")
         plot.set_axis_title("left", "Lat")
 
-        points = []
-        offsets = np.zeros((NCIRC, 2), np.int32)
-        colors = np.zeros((NCIRC, 2), np.uint32)
-        npts = 0
-        for k in range(NCIRC):
-            pts = create_circle()
-            offsets[k, 0] = k
-            offsets[k, 1] = npts
-            npts += pts.shape[0]
-            points.append(pts)
-            colors[k, 0] = COLORS[k % len(COLORS)][0]
-            colors[k, 1] = COLORS[(3 * k) % len(COLORS)][1]
-        points = np.concatenate(points)
+        points, offsets = create_circles(NCIRC)
+        colors = np.empty((NCIRC, 2), np.uint32)
+        k = np.arange(NCIRC)
+        colors[:, 0] = COLOR_TABLE[k % len(COLORS), 0]
+        colors[:, 1] = COLOR_TABLE[(3 * k) % len(COLORS), 1]
 
         print(NCIRC, "Polygons")
         print(points.shape[0], "Points")
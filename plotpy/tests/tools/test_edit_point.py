@@ -95,7 +95,7 @@ def test_edit_curve() -> None:
         y2 = np.sin(np.sin(np.sin(x2)))
         new_cdata = edit_curve(((x, y), (x2, y2), (x, np.sin(2 * y))))
         edit_curve(new_cdata)
-        print((y2 == new_cdata[1][1]).all())
+        print(np.array_equal(y2, new_cdata[1][1]))
 
 
 if __name__ == "__main__":
@@ -13,6 +13,7 @@ from guidata.qthelpers import qt_app_context
 from qtpy import QtCore as QC
 from qtpy import QtWidgets as QW
 
+from plotpy.items import CurveItem
 from plotpy.tests import vistools as ptv
 from plotpy.tests.features.test_auto_curve_image import make_curve_image_legend
 from plotpy.tools.curve import EditPointTool, SelectPointsTool
@@ -62,5 +63,27 @@ def test_baseplot_api():
         plot.notify_colormap_changed()
 
 
+def test_baseplot_curve_items():
+    """Testing BasePlot curve items tracking"""
+    with qt_app_context(exec_loop=False):
+        items = make_curve_image_legend()
+        win = ptv.show_items(items, wintitle=test_baseplot_curve_items.__doc__)
+        plot = win.get_plot()
+
+        def expected_curves():
+            return [item for item in plot.get_items() if isinstance(item, CurveItem)]
+
+        assert plot.get_curve_items() == expected_curves()
+        assert len(plot.get_curve_items()) > 0
+        curve = plot.get_curve_items()[0]
+        plot.del_item(curve)
+        assert curve not in plot.get_curve_items()
+        plot.add_item(curve)
+        assert plot.get_curve_items() == expected_curves()
+        plot.del_all_items()
+        assert plot.get_curve_items() == []
+
+
 if __name__ == "__main__":
     test_baseplot_api()
+    test_baseplot_curve_items()
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause
+# (see plotpy/LICENSE for details)
+
+"""Test colormaps"""
+
+import pytest
+from guidata.qthelpers import qt_app_context
+from qtpy import QtGui as QG
+from qwt import QwtInterval, QwtLinearColorMap
+
+from plotpy.mathutils.colormap import (
+    ALL_COLORMAPS,
+    DEFAULT_COLORMAPS,
+    FULLRANGE,
+    ICON_CACHE,
+    LARGE_ICON_HEIGHT,
+    LARGE_ICON_ORIENTATION,
+    LARGE_ICON_WIDTH,
+    LazyColormapDict,
+    RawColormap,
+    build_icon_from_cmap,
+    build_icon_from_cmap_name,
+    get_cmap,
+    prebuild_all_icons,
+)
+from plotpy.styles import image as image_styles
+from plotpy.widgets.colormap.widget import EditableColormap
+
+
+@pytest.mark.parametrize("invert", [False, True])
+@pytest.mark.parametrize(
+    "mode", [QwtLinearColorMap.ScaledColors, QwtLinearColorMap.FixedColors]
+)
+@pytest.mark.parametrize("bounds", [(0.0, 1.0), (-3.3, 17.1), (2.0, 2.0)])
+def test_colormap_color_table(invert, mode, bounds):
+    """Test that colormap color tables are the same as Qwt ones"""
+    with qt_app_context(exec_loop=False):
+        interval = QwtInterval(*bounds)
+        transparent = EditableColormap(QG.QColor(0, 0, 255, 100), QG.QColor("red"))
+        transparent.addColorStop(0.3, QG.QColor(0, 255, 0, 200))
+        edited = EditableColormap(QG.QColor("blue"), QG.QColor("red"))
+        edited.addColorStop(0.5, QG.QColor("green"))
+        edited.move_color_stop(1, 1.0)
+        for cmap in list(ALL_COLORMAPS.values()) + [transparent, edited]:
+            cmap.invert, initial_mode = invert, cmap.mode()
+            cmap.setMode(mode)
+            try:
+                table = cmap.colorTable(interval)
+                assert table == QwtLinearColorMap.colorTable(cmap, interval)
+            finally:
+                cmap.invert = False
+                cmap.setMode(initial_mode)
+
+
+def test_colormap_color_table_cache():
+    """Test that cached color tables are updated when colormap is changed"""
+    with qt_app_context(exec_loop=False):
+        cmap = EditableColormap(QG.QColor("blue"), QG.QColor("red"))
+        cmap.addColorStop(0.5, QG.QColor("green"))
+        interval = QwtInterval(0.0, 1.0)
+        table = cmap.colorTable(interval)
+        table.append(0)
+        assert len(cmap.colorTable(interval)) == 256
+        for change in (
+            lambda: cmap.move_color_stop(1, 0.25),
+            lambda: cmap.move_color_stop(1, 0.25, QG.QColor("yellow")),
+            lambda: cmap.addColorStop(0.75, QG.QColor("white")),
+            lambda: cmap.delete_stop(1),
+            lambda: setattr(cmap, "invert", True),
+            lambda: cmap.setMode(cmap.FixedColors),
+        ):
+            table = cmap.colorTable(interval)
+            change()
+            new_table = cmap.colorTable(interval)
+            assert new_table != table
+            assert new_table == QwtLinearColorMap.colorTable(cmap, interval)
+
+
+def test_prebuild_all_icons():
+    """Test that icons of all colormaps may be built in advance"""
+    with qt_app_context(exec_loop=False):
+        size = (24, 9, "h", 1)
+        prebuild_all_icons(*size)
+        for name in ALL_COLORMAPS:
+            icon = ICON_CACHE[(name, *size)][1]
+            assert build_icon_from_cmap_name(name, *size) is icon
+
+
+@pytest.mark.parametrize(
+    "iterable",
+    [
+        ((0.0, "#0000ff"), (0.25, "#00ff00"), (0.25, "#ffff00"), (1.0, "#ff0000")),
+        ((0.0, "#0000ff"), (0.5, "#00ff00"), (0.3, "#ffff00"), (1.0, "#ff0000")),
+        ((0.0, "#0000ff"), (0.9995, "#00ff00"), (1.0, "#ff0000")),
+        ((0.0, "#0000ff"), (0.5, "#8000ff00"), (1.0, "#ff0000")),
+        ((0.2, "#0000ff"), (0.6, "#00ff00"), (1.2, "#ff0000")),
+    ],
+)
+def test_colormap_from_iterable(iterable):
+    """Test that colormaps built from iterables are the same as when adding
+    color stops one by one"""
+    with qt_app_context(exec_loop=False):
+        cmap = EditableColormap.from_iterable(iterable)
+        ref_cmap = QwtLinearColorMap(
+            QG.QColor(iterable[0][1]), QG.QColor(iterable[-1][1])
+        )
+        pos_min, pos_max = iterable[0][0], iterable[-1][0]
+        for position, color in iterable[1:-1]:
+            ref_cmap.addColorStop((position - pos_min) / pos_max, QG.QColor(color))
+        assert [vars(stop) for stop in cmap.colorStops()] == [
+            vars(stop) for stop in ref_cmap.colorStops()
+        ]
+        assert cmap.colorTable(FULLRANGE) == ref_cmap.colorTable(FULLRANGE)
+
+
+def test_lazy_colormaps():
+    """Test that colormaps are built on first access, and only once"""
+    with qt_app_context(exec_loop=False):
+        raw = RawColormap(
+            "Test", ((0.0, "#0000ff"), (0.5, "#00ff00"), (1.0, "#ff0000"))
+        )
+        cmaps1 = LazyColormapDict({"test": raw})
+        cmaps2 = LazyColormapDict({**cmaps1.data})
+        assert isinstance(cmaps1.data["test"], RawColormap)
+        cmap = cmaps1["test"]
+        assert isinstance(cmap, EditableColormap)
+        assert cmap.name == "Test" and len(cmap.colorStops()) == 3
+        assert cmaps1.data["test"] is cmap
+        assert cmaps2.get("test") is cmap
+        assert list(cmaps2.values()) == [cmap]
+        assert "test" in cmaps2 and "other" not in cmaps2
+        for name in DEFAULT_COLORMAPS:
+            assert get_cmap(name) is DEFAULT_COLORMAPS[name] is ALL_COLORMAPS[name]
+
+
+def test_lazy_colormap_choices():
+    """Test that listing colormap choices does not build colormaps"""
+    with qt_app_context(exec_loop=False):
+        raw = RawColormap("Test", ((0.0, "#0000ff"), (1.0, "#ff0000")))
+        cmaps = LazyColormapDict({"test": raw})
+        old_cmaps = image_styles.ALL_COLORMAPS
+        image_styles.ALL_COLORMAPS = cmaps
+        try:
+            choices = image_styles._create_choices(None, None, None)
+        finally:
+            image_styles.ALL_COLORMAPS = old_cmaps
+        assert [choice[:2] for choice in choices] == [("Test", "Test")]
+        assert cmaps.data["test"] is raw
+
+
+def _icon_image(icon: QG.QIcon, width: int, height: int) -> QG.QImage:
+    """Return icon image of the given size"""
+    return icon.pixmap(width, height).toImage()
+
+
+@pytest.mark.parametrize(
+    "size",
+    [
+        (16, 7, "h", 0),
+        (LARGE_ICON_WIDTH, LARGE_ICON_HEIGHT, LARGE_ICON_ORIENTATION, 1),
+        (7, 16, "v", 0),
+    ],
+)
+def test_colormap_icon_cache(size):
+    """Test that colormap icons are cached by name and size"""
+    with qt_app_context(exec_loop=False):
+        width, height = size[:2]
+        for name in ("jet", "viridis"):
+            icon = build_icon_from_cmap_name(name, *size)
+            assert build_icon_from_cmap_name(name.upper(), *size) is icon
+            ref_icon = build_icon_from_cmap(get_cmap(name), *size)
+            image = _icon_image(icon, width, height)
+            assert image == _icon_image(ref_icon, width, height)
+            table = get_cmap(name).colorTable(FULLRANGE)
+            margin = size[3]
+            x1, y1 = width - 1 - margin, height - 1 - margin
+            if size[2] == "v":
+                x1 = margin
+            assert image.pixel(margin, margin) == table[0]
+            assert image.pixel(x1, y1) == table[255]
+        cmap = get_cmap("jet")
+        icon = build_icon_from_cmap_name("jet", *size)
+        cmap.invert = True
+        try:
+            new_icon = build_icon_from_cmap_name("jet", *size)
+            assert new_icon is not icon
+            assert _icon_image(new_icon, width, height) == _icon_image(
+                build_icon_from_cmap(cmap, *size), width, height
+            )
+        finally:
+            cmap.invert = False
+        assert build_icon_from_cmap_name("jet", width + 1, *size[1:]) is not icon
+
+
+if __name__ == "__main__":
+    test_colormap_color_table(False, QwtLinearColorMap.ScaledColors, (0.0, 1.0))
+    test_colormap_color_table_cache()
+    test_lazy_colormaps()
+    test_lazy_colormap_choices()
+    test_colormap_icon_cache((16, 7, "h", 0))
+    test_prebuild_all_icons()
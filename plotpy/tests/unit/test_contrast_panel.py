@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause
+# (see plotpy/LICENSE for details)
+
+"""Test contrast adjustment panel"""
+
+import numpy as np
+from guidata.qthelpers import qt_app_context
+
+from plotpy.builder import make
+from plotpy.items import HistogramItem
+
+
+def _make_contrast_dialog():
+    """Create a plot dialog with contrast panel and two images"""
+    win = make.dialog(type="image", show_contrast=True)
+    plot = win.manager.get_plot()
+    rng = np.random.default_rng(0)
+    img1 = make.image(rng.normal(0, 1, (50, 60)))
+    img2 = make.image(rng.integers(0, 1000, (40, 30)).astype(np.uint16))
+    for item in (img1, img2):
+        plot.add_item(item)
+    histogram = win.manager.get_contrast_panel().histogram
+    return win, plot, (img1, img2), histogram
+
+
+def _get_histogram_curves(histogram):
+    """Return histogram curves of the levels histogram plot"""
+    return [item for item in histogram.get_items() if isinstance(item, HistogramItem)]
+
+
+def test_contrast_tracked_items():
+    """Test items tracked by the levels histogram"""
+    with qt_app_context(exec_loop=False):
+        _win, plot, (img1, img2), histogram = _make_contrast_dialog()
+        plot.select_some_items([img1, img2])
+        tracked = dict(histogram.tracked_items_gen())
+        assert list(tracked) == [img1, img2]
+        assert len(_get_histogram_curves(histogram)) == 2
+        plot.select_some_items([img2])
+        assert list(dict(histogram.tracked_items_gen())) == [img2]
+        assert _get_histogram_curves(histogram) == [tracked[img2]]
+        # Last known selection is kept when all items are deselected
+        plot.unselect_all()
+        assert list(dict(histogram.tracked_items_gen())) == [img2]
+        plot.del_item(img2)
+        assert not list(histogram.tracked_items_gen())
+        assert not _get_histogram_curves(histogram)
+
+
+def test_contrast_selection_autoscale():
+    """Test that levels histogram is autoscaled once per selection change"""
+    with qt_app_context(exec_loop=False):
+        _win, plot, (img1, img2), histogram = _make_contrast_dialog()
+        calls = []
+        do_autoscale = histogram.do_autoscale
+
+        def autoscale(*args, **kwargs):
+            calls.append(None)
+            do_autoscale(*args, **kwargs)
+
+        histogram.do_autoscale = autoscale
+        plot.select_some_items([img1, img2])
+        assert len(calls) == 1
+        xmin, xmax = histogram.get_axis_limits("bottom")
+        assert xmin <= min(img1.data.min(), img2.data.min())
+        assert xmax >= max(img1.data.max(), img2.data.max())
+
+
+def test_contrast_range_changed():
+    """Test that moving the levels histogram range updates image LUT ranges"""
+    with qt_app_context(exec_loop=False):
+        _win, plot, (img1, img2), histogram = _make_contrast_dialog()
+        img1.set_lut_range((0.0, 1.0))
+        img2.set_lut_range((0.0, 100.0))
+        plot.select_some_items([img1, img2])
+        plot.set_active_item(img1)
+        sel_line = histogram.range.shapeparam.sel_line
+        assert sel_line.color == histogram.range_multi_color
+        histogram.range.set_range(0.5, 2.0)
+        assert img1.get_lut_range() == img2.get_lut_range() == (0.5, 2.0)
+        assert sel_line.color == histogram.range_mono_color
+        sel_pen = histogram.range.sel_pen
+        histogram.range.set_range(0.5, 3.0)
+        assert img2.get_lut_range() == (0.5, 3.0)
+        assert histogram.range.sel_pen is sel_pen
+
+
+def test_contrast_range_functions():
+    """Test range functions applied to all items tracked by levels histogram"""
+    with qt_app_context(exec_loop=False):
+        _win, plot, (img1, img2), histogram = _make_contrast_dialog()
+        plot.select_some_items([img1, img2])
+        histogram.set_full_range()
+        zmin = min(img1.data.min(), img2.data.min())
+        zmax = max(img1.data.max(), img2.data.max())
+        assert histogram.range.get_range() == (zmin, zmax)
+        assert img1.get_lut_range() == img2.get_lut_range() == (zmin, zmax)
+        histogram.set_max(10.0)
+        assert img2.get_lut_range() == (zmin, 10.0)
+        histogram.eliminate_outliers(10.0)
+        zmin, zmax = img1.get_lut_range()
+        assert img1.data.min() < zmin < zmax < img2.data.max()
+
+
+if __name__ == "__main__":
+    test_contrast_tracked_items()
+    test_contrast_selection_autoscale()
+    test_contrast_range_changed()
+    test_contrast_range_functions()
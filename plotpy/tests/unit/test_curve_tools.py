@@ -161,9 +161,10 @@ def test_edit_point_tool():
         # point
         curve_item.param.dsamp_factor = 20
         win.manager.add_tool(DownSamplingTool).activate()
-        # The steps must be very small to ensure the mouse passes close
-        # enough to the first point of the curve to move it (distance < threshold)
-        n = 1000
+        # The steps must be small enough to ensure the mouse passes close
+        # enough to the first point of the curve to move it (distance < threshold):
+        # one step per canvas pixel is enough
+        n = win.manager.get_plot().canvas().height()
         min_v, max_v = 0, 1
         x_path = np.full(n, min_v)
         y_path = np.linspace(max_v, min_v, n)
@@ -173,6 +174,7 @@ def test_edit_point_tool():
 
         drag_mouse(win, x_path, y_path)
         curve_changes = tool.get_changes()[curve_item]
+        assert len(curve_changes) == 2  # First and last points have been moved
 
         x_arr, y_arr = curve_item.get_data()
         for i, (x, y) in curve_changes.items():
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause
+# (see plotpy/LICENSE for details)
+
+"""Test curve fitting widgets"""
+
+import numpy as np
+import pytest
+from guidata.qthelpers import qt_app_context
+
+from plotpy.plot import PlotOptions
+from plotpy.widgets.fit import FitDialog, FitParam, parse_norm_order, vector_norm
+
+METHODS = ("simplex", "powel", "bfgs", "l_bfgs_b", "cg", "lq")
+
+
+def fit(x: np.ndarray, params: list[float]) -> np.ndarray:
+    """Fit function"""
+    a, b = params
+    return np.cos(b * x) + a
+
+
+def jac(x: np.ndarray, params: list[float]) -> np.ndarray:
+    """Jacobian of the fit function"""
+    _a, b = params
+    return np.column_stack((np.ones_like(x), -x * np.sin(b * x)))
+
+
+def _make_fit_dialog(
+    offset: FitParam | None = None, frequency: FitParam | None = None
+) -> FitDialog:
+    """Create a fit dialog with noisy cosine data (offset=0.1, frequency=1.5)"""
+    x = np.linspace(-10, 10, 1000)
+    y = np.cos(1.5 * x) + np.random.default_rng(0).random(x.size) * 0.2
+    if offset is None:
+        offset = FitParam("Offset", 0.0, -1.0, 1.0)
+    if frequency is None:
+        frequency = FitParam("Frequency", 1.45, 0.3, 3.0, logscale=True)
+    win = FitDialog(auto_fit=True, options=PlotOptions(type="curve"))
+    win.set_data(x, y, fit, [offset, frequency])
+    return win
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_autofit(method):
+    """Test automatic fit methods"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog()
+        win.fit_widget.autofit_prm.method = method
+        win.autofit()
+        assert np.allclose(win.get_values(), [0.1, 1.5], atol=5e-3)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_autofit_memoize(method):
+    """Test that fit function is not evaluated twice in a row with the same
+    parameters during automatic fit"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog()
+        calls = []
+
+        fitw = win.fit_widget
+
+        def counting_fit(x, params):
+            if x is not fitw.x:  # Not called by `refresh`
+                calls.append(tuple(params))
+            return fit(x, params)
+
+        fitw.fitfunc = counting_fit
+        fitw.autofit_prm.method = method
+        calls.clear()
+        fitw.autofit()
+        assert all(prev != params for prev, params in zip(calls, calls[1:]))
+        # Memoization is reset once the fit is done
+        err = fitw.errorfunc(calls[0])
+        assert calls[-1] == calls[0]
+        assert fitw.errorfunc(calls[0]) is not err
+        assert calls[-2] == calls[-1]
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_autofit_maxiter(method):
+    """Test that the number of iterations of automatic fit is limited"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog()
+        fitw = win.fit_widget
+        calls = []
+
+        def counting_fit(x, params):
+            if x is not fitw.x:  # Not called by `refresh`
+                calls.append(None)
+            return fit(x, params)
+
+        fitw.fitfunc = counting_fit
+        fitw.autofit_prm.method = method
+        fitw.autofit()
+        ncalls = len(calls)
+        calls.clear()
+        fitw.autofit_prm.maxiter = 2
+        for prm, value in zip(fitw.fitparams, (0.0, 1.45)):
+            prm.value = value
+        fitw.autofit()
+        assert len(calls) < ncalls
+
+
+@pytest.mark.parametrize("order", [2.0, 1.0, 3.0, 0.5, 0.0, -1.0, np.inf, -np.inf])
+def test_vector_norm(order):
+    """Test vector norm computation without temporary arrays"""
+    vec = np.random.default_rng(0).normal(size=1000)
+    ref_vec = vec.copy()
+    norm = vector_norm(vec, order, np.empty_like(vec))
+    assert norm == pytest.approx(np.linalg.norm(vec, order), rel=1e-12)
+    assert np.array_equal(vec, ref_vec)
+    ivec = np.array([-3, 1, 2, 5])
+    norm = vector_norm(ivec, order, np.empty(ivec.shape))
+    assert norm == pytest.approx(np.linalg.norm(ivec, order), rel=1e-12)
+
+
+@pytest.mark.parametrize(
+    "text, order",
+    [("2.0", 2.0), ("1", 1.0), (" 1.5e0 ", 1.5), ("inf", np.inf), ("-np.inf", -np.inf)],
+)
+def test_parse_norm_order(text, order):
+    """Test norm order parsing"""
+    assert parse_norm_order(text) == order
+
+
+def test_parse_norm_order_invalid():
+    """Test that norm orders are not evaluated as Python expressions"""
+    with pytest.raises(ValueError):
+        parse_norm_order("__import__('os').getcwd()")
+
+
+@pytest.mark.parametrize("err_norm", ["2.0", "1", "inf"])
+def test_norm_func(err_norm):
+    """Test the norm of the error function, used by minimization methods"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog()
+        fitw = win.fit_widget
+        fitw.autofit_prm.err_norm = err_norm
+        func = fitw.get_norm_func()
+        params = [0.2, 1.4]
+        expected = np.linalg.norm(fitw.errorfunc(params), float(err_norm))
+        assert func(params) == pytest.approx(expected, rel=1e-12)
+        assert func(params) == pytest.approx(expected, rel=1e-12)
+
+
+def test_fit_range():
+    """Test that the error function is restricted to the automatic fit range"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog()
+        fitw = win.fit_widget
+        params = [0.1, 1.5]
+        assert fitw.errorfunc(params).size == fitw.x.size
+        fitw.range_changed(None, -5.0, 5.0)
+        imin, imax = fitw.i_min, fitw.i_max
+        err = fitw.errorfunc(params)
+        x, y = fitw.x[imin:imax], fitw.y[imin:imax]
+        assert x.min() >= -5.0 and x.max() <= 5.0
+        assert np.array_equal(err, y - fit(x, params))
+        fitw.set_data(fitw.x[:500], fitw.y[:500])
+        assert fitw.errorfunc(params).size == 500
+        # Data arrays assigned directly
+        imin, imax = fitw.i_min, fitw.i_max
+        fitw.y = fitw.y * 2.0
+        err = fitw.errorfunc(params)
+        x, y = fitw.x[imin:imax], fitw.y[imin:imax]
+        assert np.array_equal(err, y - fit(x, params))
+
+
+@pytest.mark.parametrize("err_norm", ["2.0", "1.5"])
+def test_norm_grad_func(err_norm):
+    """Test the gradient of the norm of the error function"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog()
+        fitw = win.fit_widget
+        fitw.autofit_prm.err_norm = err_norm
+        assert fitw.get_norm_grad_func() is None
+        fitw.set_fit_data(fit, fitw.fitparams, jacfunc=jac)
+        func, grad = fitw.get_norm_func(), fitw.get_norm_grad_func()
+        params = np.array([0.2, 1.4])
+        eps = 1e-7
+        expected = [
+            (func(params + dp) - func(params - dp)) / (2 * eps)
+            for dp in np.eye(2) * eps
+        ]
+        assert grad(params) == pytest.approx(expected, rel=1e-5)
+        fitw.autofit_prm.err_norm = "inf"
+        assert fitw.get_norm_grad_func() is None
+
+
+@pytest.mark.parametrize("method", ["lq", "l_bfgs_b", "bfgs", "cg"])
+def test_autofit_jacobian(method):
+    """Test automatic fit with a Jacobian function"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog()
+        fitw = win.fit_widget
+        calls = []
+
+        def counting_fit(x, params):
+            calls.append(None)
+            return fit(x, params)
+
+        fitw.autofit_prm.method = method
+        fitw.set_fit_data(counting_fit, fitw.fitparams)
+        fitw.autofit()
+        values, ncalls = fitw.get_values(), len(calls)
+
+        for prm, value in zip(fitw.fitparams, (0.0, 1.45)):
+            prm.value = value
+        fitw.set_fit_data(counting_fit, fitw.fitparams, jacfunc=jac)
+        calls.clear()
+        fitw.autofit()
+        assert np.allclose(fitw.get_values(), values, atol=5e-3)
+        assert len(calls) < ncalls
+
+
+def test_refresh_yfit_cache():
+    """Test that refresh evaluates the fit function only when parameters change"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog()
+        fitw = win.fit_widget
+        calls = []
+
+        def counting_fit(x, params):
+            if x is fitw.x:  # Called by `refresh`
+                calls.append(tuple(params))
+            return fit(x, params)
+
+        fitw.set_fit_data(counting_fit, fitw.fitparams)
+        assert len(calls) == 1
+        fitw.refresh()
+        fitw.fitparams[0].update()
+        assert len(calls) == 1
+        fitw.fitparams[0].value = 0.2
+        fitw.refresh()
+        assert calls[-1] == (0.2, 1.45)
+        yfit = fitw.fit_curve.get_data()[1]
+        assert np.array_equal(yfit, fit(fitw.x, [0.2, 1.45]))
+        calls.clear()
+        fitw.autofit()
+        assert calls == [tuple(fitw.get_values())]
+
+        # Fit function, arguments and x data are also taken into account
+        fitw.fitfunc = lambda x, params, scale=1.0: scale * fit(x, params)
+        fitw.refresh()
+        yfit = fitw.fit_curve.get_data()[1]
+        assert np.array_equal(yfit, fit(fitw.x, fitw.get_values()))
+        fitw.fitkwargs = {"scale": 2.0}
+        fitw.refresh()
+        yfit = fitw.fit_curve.get_data()[1]
+        assert np.array_equal(yfit, 2.0 * fit(fitw.x, fitw.get_values()))
+        fitw.x = fitw.x * 0.5
+        fitw.refresh()
+        yfit = fitw.fit_curve.get_data()[1]
+        assert np.array_equal(yfit, 2.0 * fit(fitw.x, fitw.get_values()))
+
+
+@pytest.mark.parametrize("logscale", [False, True])
+def test_fit_param_slider(logscale):
+    """Test fit parameter slider/value conversions"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog()
+        prm = win.fit_widget.fitparams[1]
+        prm.logscale = logscale
+        prm.slider_value_changed(1234)
+        value = prm.value
+        assert prm.min < value < prm.max
+        prm.update_slider_value()
+        assert abs(prm.slider.value() - 1234) <= 1
+        prm.value = prm.min - 1.0
+        prm.update_slider_value()
+        assert prm.slider.value() == 0
+        # Degenerate bounds (max < min)
+        prm.min, prm.max = 3.0, 0.5
+        prm.slider_value_changed(1234)
+        expected = 3.0 if logscale else 3.0 - 2.5 * 1234 / (prm.steps - 1)
+        assert prm.value == pytest.approx(expected)
+
+
+def test_autofit_jacobian_shape():
+    """Test that a Jacobian function returning an array of wrong shape is rejected"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog()
+        fitw = win.fit_widget
+        fitw.set_fit_data(fit, fitw.fitparams, jacfunc=lambda x, p: jac(x, p).T)
+        with pytest.raises(ValueError, match="expected"):
+            fitw.autofit()
+
+        # 1-D Jacobian is accepted for a single parameter
+        fitw.set_fit_data(
+            lambda x, p: np.cos(1.5 * x) + p[0],
+            [FitParam("Offset", 0.0, -1.0, 1.0)],
+            jacfunc=lambda x, p: np.ones_like(x),
+        )
+        fitw.autofit()
+        assert fitw.get_values() == pytest.approx([0.1], abs=5e-3)
+
+
+def test_autofit_lq_bounds():
+    """Test that least squares fit stays within fit parameter bounds"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog(offset=FitParam("Offset", 0.5, 0.2, 1.0))
+        win.autofit()
+        offset, frequency = win.get_values()
+        assert offset == pytest.approx(0.2)
+        assert frequency == pytest.approx(1.5, abs=2e-2)
+
+        # Fixed parameter (min == max)
+        win = _make_fit_dialog(offset=FitParam("Offset", 0.3, 0.3, 0.3))
+        win.autofit()
+        offset, frequency = win.get_values()
+        assert offset == 0.3
+        assert frequency == pytest.approx(1.5, abs=2e-2)
+
+
+def test_autofit_l_bfgs_bounds():
+    """Test that L-BFGS-B fit stays within fit parameter bounds"""
+    with qt_app_context(exec_loop=False):
+        win = _make_fit_dialog(offset=FitParam("Offset", 0.5, 0.2, 1.0))
+        win.fit_widget.autofit_prm.method = "l_bfgs_b"
+        win.autofit()
+        offset, frequency = win.get_values()
+        assert offset == pytest.approx(0.2)
+        assert frequency == pytest.approx(1.5, abs=2e-2)
+
+
+if __name__ == "__main__":
+    for method in METHODS:
+        test_autofit(method)
+        test_autofit_memoize(method)
+        test_autofit_maxiter(method)
+    test_vector_norm(3.0)
+    test_parse_norm_order("-np.inf", -np.inf)
+    test_parse_norm_order_invalid()
+    test_norm_func("2.0")
+    test_fit_range()
+    test_norm_grad_func("1.5")
+    for method in ("lq", "l_bfgs_b", "bfgs", "cg"):
+        test_autofit_jacobian(method)
+    test_autofit_jacobian_shape()
+    test_refresh_yfit_cache()
+    test_fit_param_slider(True)
+    test_autofit_lq_bounds()
+    test_autofit_l_bfgs_bounds()
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause
+# (see plotpy/LICENSE for details)
+
+"""Test histogram item and histogram data source"""
+
+import numpy as np
+import pytest
+from guidata.qthelpers import qt_app_context
+
+from plotpy.builder import make
+from plotpy.items.histogram import HistDataSource
+
+
+def test_hist_data_source_cache():
+    """Test that histogram data source reuses its last result"""
+    data = np.random.default_rng(0).normal(0, 1, (1000,))
+    src = HistDataSource(data)
+    hist, bins = src.get_histogram(20)
+    assert src.get_histogram(20)[0] is hist
+    exp_hist, exp_bins = np.histogram(data, bins=20)
+    assert np.array_equal(hist, exp_hist) and np.array_equal(bins, exp_bins)
+    assert src.get_histogram(20, (-1.0, 1.0))[0] is not hist
+    assert src.get_histogram(20, [-1.0, 1.0])[0].sum() < data.size
+    src.data = data * 2
+    assert src.get_histogram(20, (-1.0, 1.0))[0].sum() < hist.sum()
+    for dtype in (np.float32, np.int32):
+        src.data = (data * 100).astype(dtype)
+        for nbins in (10, 20):
+            hist, bins = src.get_histogram(nbins)
+            exp_hist, exp_bins = np.histogram(src.data, bins=nbins)
+            assert np.array_equal(hist, exp_hist)
+            assert bins.dtype == exp_bins.dtype and np.array_equal(bins, exp_bins)
+    src.data = np.array([])
+    assert src.get_histogram(4)[0].sum() == 0
+    for data in (np.arange(200.0).reshape(10, 20).T[::2], [1, 2, 2, 3, 3, 3]):
+        src.data = data
+        hist, bins = src.get_histogram(3)
+        exp_hist, exp_bins = np.histogram(data, bins=3)
+        assert np.array_equal(hist, exp_hist) and np.array_equal(bins, exp_bins)
+
+
+def test_hist_data_source_flat_cache():
+    """Test that only views on data are kept by histogram data source"""
+    data = np.random.default_rng(0).normal(0, 1, (200, 300))
+    src = HistDataSource(data)
+    src.get_histogram(20)
+    assert np.shares_memory(src._flat_cache[1], data)
+    for data in (data.T, data[:, ::2]):
+        src.data = data
+        hist, bins = src.get_histogram(20)
+        assert src._flat_cache is None
+        exp_hist, exp_bins = np.histogram(data, bins=20)
+        assert np.array_equal(hist, exp_hist) and np.array_equal(bins, exp_bins)
+        assert np.array_equal(src.get_histogram(10)[0], np.histogram(data, 10)[0])
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16])
+@pytest.mark.parametrize("drange", [None, (10.5, 200.3), (-5, 70000), (3, 3)])
+@pytest.mark.parametrize("nbins", [1, 7, 256])
+def test_hist_data_source_uint(dtype, drange, nbins):
+    """Test unsigned integer histogram against `np.histogram`"""
+    data = np.random.default_rng(0).integers(0, 256, (30, 20)).astype(dtype)
+    hist, bins = HistDataSource(data).get_histogram(nbins, drange)
+    exp_hist, exp_bins = np.histogram(data, bins=nbins, range=drange)
+    assert hist.dtype == exp_hist.dtype and np.array_equal(hist, exp_hist)
+    assert bins.dtype == exp_bins.dtype and np.array_equal(bins, exp_bins)
+
+
+def test_hist_data_source_edges():
+    """Test data source histogram with bin edges instead of a number of bins"""
+    data = np.random.default_rng(0).integers(0, 1000, (100, 100))
+    edges = np.array([0.0, 10.0, 10.0, 100.0, 500.0, 998.0])
+    for data in (data, data.astype(np.uint16), data.astype(float)):
+        src = HistDataSource(data)
+        for drange in (None, (0.0, 10.0)):
+            hist, bins = src.get_histogram(edges, drange)
+            exp_hist, exp_bins = np.histogram(data, bins=edges)
+            assert np.array_equal(hist, exp_hist) and np.array_equal(bins, exp_bins)
+        assert src.get_histogram(edges[:-1])[0].size == edges.size - 2
+
+
+def test_hist_data_source_edges_cache():
+    """Test that histogram data source cache handles bin edges arrays"""
+    data = np.random.default_rng(0).normal(0, 1, (1000,))
+    src = HistDataSource(data)
+    edges = np.linspace(-2.0, 2.0, 9)
+    hist, _bins = src.get_histogram(edges)
+    # Data range is not computed (it is ignored with bin edges)
+    assert src._range_cache is None
+    # Same edges in another array: cached result is reused
+    assert src.get_histogram(edges.copy())[0] is hist
+    assert src.get_histogram(list(edges))[0] is hist
+    # Edges modified: histogram is computed again
+    edges[-1] = 3.0
+    new_hist, _bins = src.get_histogram(edges)
+    assert new_hist is not hist
+    assert np.array_equal(new_hist, np.histogram(data, bins=edges)[0])
+    assert src.get_histogram(8)[0].size == 8
+    src = HistDataSource(data, max_samples=100)
+    hist, _bins = src.get_histogram(edges)
+    assert src._range_cache is None
+    assert hist.sum() == pytest.approx(np.histogram(data, bins=edges)[0].sum(), 0.1)
+
+
+def test_hist_data_source_max_samples():
+    """Test approximate histogram of data source with a maximum number of samples"""
+    data = np.random.default_rng(0).normal(1000, 100, (1000, 1000))
+    for data in (data, data.astype(np.uint16)):
+        exp_hist, exp_bins = np.histogram(data, bins=50)
+        src = HistDataSource(data, max_samples=data.size)
+        assert np.array_equal(src.get_histogram(50)[0], exp_hist)
+        src = HistDataSource(data, max_samples=100000)
+        hist, bins = src.get_histogram(50)
+        assert np.array_equal(bins, exp_bins)
+        assert abs(hist.sum() - data.size) < 10
+        assert np.abs(hist - exp_hist).max() < 0.05 * exp_hist.max()
+
+
+def test_histogram_item_logscale():
+    """Test that switching histogram to log scale does not scan data again"""
+    with qt_app_context(exec_loop=False):
+        data = np.random.default_rng(0).normal(0, 1, (1000,))
+        item = make.histogram(data, bins=50)
+        src = item.get_hist_source()
+        cache = src.histogram_cache
+        _x, y = item.get_data()
+        item.set_logscale(True)
+        assert src.histogram_cache is cache
+        _x, ylog = item.get_data()
+        assert np.allclose(ylog, np.log(y + 1))
+
+
+def test_histogram_item_autoscale():
+    """Test that histogram plot is autoscaled only when histogram changes"""
+    with qt_app_context(exec_loop=False):
+        data = np.random.default_rng(0).normal(0, 1, (1000,))
+        win = make.dialog(type="curve")
+        plot = win.manager.get_plot()
+        item = make.histogram(data, bins=50)
+        plot.add_item(item)
+        calls = []
+        do_autoscale = plot.do_autoscale
+
+        def autoscale(*args, **kwargs):
+            calls.append(None)
+            do_autoscale(*args, **kwargs)
+
+        plot.do_autoscale = autoscale
+        item.update_histogram()
+        assert len(calls) == 1
+        item.update_histogram()
+        item.histparam.update_hist(item)
+        assert len(calls) == 1
+        item.set_logscale(True)
+        item.set_bins(20)
+        item.set_hist_data(data * 10)
+        assert len(calls) == 4
+        xmin, xmax = plot.get_axis_limits("bottom")
+        assert xmin <= data.min() * 10 and xmax >= data.max() * 10
+
+
+if __name__ == "__main__":
+    test_hist_data_source_cache()
+    test_hist_data_source_flat_cache()
+    test_hist_data_source_uint(np.uint16, None, 256)
+    test_hist_data_source_edges()
+    test_hist_data_source_edges_cache()
+    test_hist_data_source_max_samples()
+    test_histogram_item_logscale()
+    test_histogram_item_autoscale()
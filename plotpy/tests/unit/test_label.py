@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause
+# (see plotpy/LICENSE for details)
+
+"""Test label and legend items"""
+
+import numpy as np
+import pytest
+from guidata.qthelpers import qt_app_context
+from qtpy import QtCore as QC
+from qtpy import QtGui as QG
+
+from plotpy.builder import make
+from plotpy.items.label import (
+    ANCHOR_FACTORS,
+    ANCHORS,
+    SelectedLegendBoxItem,
+    get_anchor_position,
+    get_range_indices,
+)
+from plotpy.plot import PlotDialog
+
+
+@pytest.mark.parametrize("anchor", list(ANCHOR_FACTORS))
+def test_anchor_position(anchor):
+    """Test anchor positions in a rectangle"""
+    r = QC.QRectF(10.0, 20.0, 30.0, 40.0)
+    expected = {
+        "TL": (r.left(), r.top()),
+        "TR": (r.right(), r.top()),
+        "BL": (r.left(), r.bottom()),
+        "BR": (r.right(), r.bottom()),
+        "L": (r.left(), (r.top() + r.bottom()) / 2.0),
+        "R": (r.right(), (r.top() + r.bottom()) / 2.0),
+        "T": ((r.left() + r.right()) / 2.0, r.top()),
+        "B": ((r.left() + r.right()) / 2.0, r.bottom()),
+        "C": ((r.left() + r.right()) / 2.0, (r.top() + r.bottom()) / 2.0),
+    }[anchor]
+    assert get_anchor_position(anchor, r) == pytest.approx(expected)
+    assert ANCHORS[anchor](r) == pytest.approx(expected)
+
+
+def test_range_indices():
+    """Test range indices computation, whatever the order of the bounds"""
+    x = np.linspace(0.0, 10.0, 11)
+    assert get_range_indices(x, 2.5, 7.0) == (3, 7)
+    assert get_range_indices(x, 7.0, 2.5) == (3, 7)
+    assert get_range_indices(x, -5.0, 20.0) == (0, 11)
+
+
+def test_label_text_size_cache():
+    """Test that label text size is recomputed only when text changes"""
+    with qt_app_context(exec_loop=False):
+        label = make.label("Short", "TL", (0, 0), "TL")
+        size = label.get_text_size()
+        assert label.get_text_size() is size
+        label.set_text("Short")
+        assert label.get_text_size() is size
+        label.labelparam.update_item(label)
+        assert label.get_text_size() is size
+        label.set_text_style(color="#ff0000")
+        assert label.get_text_size() is not size
+        size = label.get_text_size()
+        label.set_text("A much longer label text")
+        new_size = label.get_text_size()
+        assert new_size.width() > size.width()
+        rect = label.get_text_rect()
+        assert rect.width() == new_size.width()
+
+
+def test_data_info_label_update():
+    """Test that computation labels are updated only when their inputs change"""
+    with qt_app_context(exec_loop=False):
+        x = np.linspace(-10, 10, 200)
+        curve = make.curve(x, np.sin(x))
+        xrange = make.range(-2.0, 2.0)
+        calls = []
+
+        def func(x, y):
+            calls.append(None)
+            return y.max()
+
+        label = make.computation(xrange, "TL", "max=%.3f", curve, func)
+        label.update_text()
+        text = label.get_plain_text()
+        label.update_text()
+        assert len(calls) == 1
+        xrange.set_range(-1.0, 1.0, dosignal=False)
+        label.update_text()
+        assert len(calls) == 2
+        curve.set_data(x, 2 * np.sin(x))
+        label.update_text()
+        assert len(calls) == 3
+        assert label.get_plain_text() != text
+        xrange.set_range(1.01, 1.02, dosignal=False)
+        label.update_text()
+        assert label.get_plain_text().endswith("max=nan")
+
+
+def test_data_info_label_in_place_update():
+    """Test that computation labels are updated when curve data is modified in
+    place, then set again or updated"""
+    with qt_app_context(exec_loop=False):
+        x = np.linspace(-10, 10, 200)
+        y = np.sin(x)
+        curve = make.curve(x, y)
+        xrange = make.range(-10.0, 10.0)
+        label = make.computation(xrange, "TL", "max=%.3f", curve, lambda x, y: y.max())
+        label.update_text()
+        assert label.get_plain_text().endswith(f"max={y.max():.3f}")
+        y *= 5
+        curve.set_data(x, y)
+        label.update_text()
+        assert label.get_plain_text().endswith(f"max={y.max():.3f}")
+        y *= 2
+        curve.update_data()
+        label.update_text()
+        assert label.get_plain_text().endswith(f"max={y.max():.3f}")
+
+
+def _make_legend_dialog():
+    """Create a plot dialog with two curves and a legend box"""
+    x = np.linspace(-10, 10, 200)
+    win = make.dialog(type="curve")
+    plot = win.manager.get_plot()
+    curve1 = make.curve(x, np.sin(x), color="b", title="Sine")
+    curve2 = make.curve(x, np.cos(x), color="r", title="Cosine")
+    legend = make.legend("TR")
+    for item in (curve1, curve2, legend):
+        plot.add_item(item)
+    return win, plot, (curve1, curve2), legend
+
+
+def test_legend_items_cache():
+    """Test that legend items are cached until the legend contents change"""
+    with qt_app_context(exec_loop=False):
+        win, plot, (curve1, curve2), legend = _make_legend_dialog()
+        assert isinstance(win, PlotDialog)
+        items = legend.get_legend_items()
+        assert len(items) == 2
+        assert legend.get_legend_items() is items
+        sizes = legend.sizes
+        _tw, th, _width, height = sizes
+        assert len(legend._legend_y_starts) == 3
+        assert th == pytest.approx(legend._legend_y_starts[-1])
+
+        curve1.param.label = "A much longer curve title"
+        curve1.param.update_item(curve1)
+        new_items = legend.get_legend_items()
+        assert new_items is not items
+        assert legend.sizes[0] > sizes[0]
+
+        legend.get_text_rect()
+        _tw, _th, _width, height = legend.sizes
+        assert legend.click_inside(10, 1)[3] is curve1
+        assert legend.click_inside(10, 5)[3] is curve1
+        assert legend.click_inside(10, 5 + height + 3)[3] is curve2
+        assert legend.click_inside(100, 5)[3] is None
+        assert legend.click_inside(10, 5 + 2 * (height + 3))[3] is None
+
+        curve1.setVisible(False)
+        assert len(legend.get_legend_items()) == 1
+        # Text document of unchanged curve label is reused
+        assert legend.get_legend_items()[0][0] is new_items[1][0]
+
+        new_items = legend.get_legend_items()
+        legend.set_text_style(QG.QFont(legend.font), legend.color)
+        assert legend.get_legend_items() is new_items
+        legend.set_text_style(color="#ff0000")
+        assert legend.get_legend_items() is not new_items
+        plot.replot()
+        win.show()
+        assert not win.grab().isNull()
+
+
+def test_selected_legend_items():
+    """Test that selected legend box only shows its own items"""
+    with qt_app_context(exec_loop=False):
+        _win, plot, (curve1, curve2), _legend = _make_legend_dialog()
+        legend = make.legend("TL", restrict_items=[curve1])
+        assert isinstance(legend, SelectedLegendBoxItem)
+        plot.add_item(legend)
+        assert len(legend.get_legend_items()) == 1
+        legend.add_item(curve2)
+        assert len(legend.get_legend_items()) == 2
+        legend.remove_item(curve1)
+        assert len(legend.get_legend_items()) == 1
+        assert not legend.include_item(curve1)
+
+
+def test_label_hit_test():
+    """Test label hit test"""
+    with qt_app_context(exec_loop=False):
+        win, plot, _curves, legend = _make_legend_dialog()
+        label = make.label("Label", "TL", (0, 0), "TL")
+        plot.add_item(label)
+        win.show()
+        for item in (label, legend):
+            canvas_rect = plot.canvas().contentsRect()
+            xmap = plot.canvasMap(item.xAxis())
+            ymap = plot.canvasMap(item.yAxis())
+            x, y = item.get_top_left(xmap, ymap, canvas_rect)
+            rect = item.get_text_rect()
+            x1, y1 = x + rect.width(), y + rect.height()
+            for px, py, inside in (
+                (x, y, True),
+                (x1, y1, True),
+                ((x + x1) / 2, (y + y1) / 2, True),
+                (x - 1, y, False),
+                (x1 + 1, y, False),
+                (x, y1 + 1, False),
+            ):
+                pos = QC.QPointF(px, py)
+                assert item.hit_test(pos)[2] == QC.QRectF(rect).translated(
+                    x, y
+                ).contains(pos)
+                assert item.hit_test(pos)[2] == inside
+
+
+if __name__ == "__main__":
+    test_range_indices()
+    test_label_text_size_cache()
+    test_data_info_label_update()
+    test_data_info_label_in_place_update()
+    test_legend_items_cache()
+    test_selected_legend_items()
+    test_label_hit_test()
@@ -188,18 +188,27 @@ def drag_mouse(
         click: Whether a click must be simulated (mouse hold -> drag -> mouse release).
          Defaults to True.
     """
-    x0, y0 = x_path[0], y_path[0]
-    xn, yn = x_path[-1], y_path[-1]
-    press = (QC.QEvent.Type.MouseButtonPress,)
-    move = (QC.QEvent.Type.MouseMove,)
-    release = (QC.QEvent.Type.MouseButtonRelease,)
+    # Canvas geometry is resolved once for the whole path (the canvas is neither
+    # resized nor moved while dragging)
+    canvas = win.manager.get_plot().canvas()
+    size = canvas.size()
+    origin = canvas.mapToGlobal(QC.QPoint(0, 0))
+    positions = [
+        QC.QPointF(x * size.width(), y * size.height()) for x, y in zip(x_path, y_path)
+    ]
+    qapp = QW.QApplication.instance()
+
+    def send_event(type_: QC.QEvent.Type, canvas_pos: QC.QPointF) -> None:
+        global_pos = QC.QPointF(origin + canvas_pos.toPoint())
+        mouse_event = QG.QMouseEvent(type_, canvas_pos, global_pos, btn, btn, mod)
+        qapp.sendEvent(canvas, mouse_event)
 
     if click:
-        mouse_event_at_relative_plot_pos(win, (x0, y0), press, mod, btn)
-    for x, y in zip(x_path, y_path):
-        mouse_event_at_relative_plot_pos(win, (x, y), move, mod, btn)
+        send_event(QC.QEvent.Type.MouseButtonPress, positions[0])
+    for canvas_pos in positions:
+        send_event(QC.QEvent.Type.MouseMove, canvas_pos)
     if click:
-        mouse_event_at_relative_plot_pos(win, (xn, yn), release, mod, btn)
+        send_event(QC.QEvent.Type.MouseButtonRelease, positions[-1])
 
 
 def create_window(
@@ -224,13 +233,16 @@ def create_window(
         items = make_curve_image_legend()
     win = ptv.show_items(items, wintitle="Unit test plot", auto_tools=False)
     plot = win.manager.get_plot()
-    for item in items:
-        plot.set_active_item(item)
     if active_item_type is None:
         plot.unselect_all()
         last_active_item = None
     else:
-        last_active_item = plot.get_last_active_item(active_item_type)
+        # Last item of the given type: the one which would be the last active item
+        # after activating each item in turn (without the cost of doing it)
+        last_active_item = next(
+            (item for item in reversed(items) if active_item_type in item.types()),
+            None,
+        )
     if last_active_item is not None:
         plot.set_active_item(last_active_item)
 
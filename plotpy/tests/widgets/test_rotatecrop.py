@@ -70,7 +70,7 @@ def dialog_test(fname="brain.png"):
     if exec_dialog(dlg) == QW.QDialog.Accepted:
         array1 = dlg.transform.get_result()
         if array0.shape == array1.shape:
-            assert (array1 == array0).all()
+            assert np.array_equal(array1, array0)
             imshow(array1 - array0, title="array1-array0")
         else:
             print(array0.shape, "-->", array1.shape)
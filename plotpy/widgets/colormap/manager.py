@@ -41,6 +41,7 @@ from plotpy.mathutils.colormap import (
     LARGE_ICON_WIDTH,
     add_cmap,
     build_icon_from_cmap,
+    build_icon_from_cmap_name,
     cmap_exists,
     delete_cmap,
     get_cmap,
@@ -156,8 +157,12 @@ class ColorMapManager(QW.QDialog):
         self._cmap_choice = QW.QComboBox()
         self._cmap_choice.setMaxVisibleItems(15)
         for cmap in ALL_COLORMAPS.values():
-            icon = build_icon_from_cmap(
-                cmap, LARGE_ICON_WIDTH, LARGE_ICON_HEIGHT, LARGE_ICON_ORIENTATION, 1
+            icon = build_icon_from_cmap_name(
+                cmap.name,
+                LARGE_ICON_WIDTH,
+                LARGE_ICON_HEIGHT,
+                LARGE_ICON_ORIENTATION,
+                1,
             )
             self._cmap_choice.addItem(icon, cmap.name, cmap)
 
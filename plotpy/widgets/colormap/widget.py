@@ -60,6 +60,7 @@ class EditableColormap(QwtLinearColorMap):
         super().__init__(*args)
         self.name = name or "temporary"
         self.invert = False
+        self.__color_table: tuple[tuple, list[int]] | None = None
 
     def __deepcopy__(self, memo: dict[int, object]) -> EditableColormap:
         """Deepcopy method to copy the colormap object.
@@ -94,6 +95,83 @@ class EditableColormap(QwtLinearColorMap):
             )
         return super().rgb(interval, value)
 
+    def colorTable(self, interval: QwtInterval) -> list[int]:
+        """Returns a color table of 256 colors for the given interval.
+        This overriden method computes all colors at once with NumPy, instead of
+        calling the `rgb` method for each color: the result is the same.
+        The last computed color table is cached, until the colormap (or the interval)
+        is changed.
+
+        Args:
+            interval: QwtInterval of the colormap
+
+        Returns:
+            Color table (list of 256 RGB integers), that can be used for a QImage.
+        """
+        stops: list[ColorStop] = self.colorStops()
+        key = (
+            interval.minValue(),
+            interval.maxValue(),
+            self.invert,
+            self.mode(),
+            tuple((stop.pos, stop.rgb) for stop in stops),
+        )
+        if self.__color_table is None or self.__color_table[0] != key:
+            self.__color_table = (key, self.__compute_color_table(interval, stops))
+        return list(self.__color_table[1])
+
+    def __compute_color_table(
+        self, interval: QwtInterval, stops: list[ColorStop]
+    ) -> list[int]:
+        """Computes a color table of 256 colors for the given interval.
+
+        Args:
+            interval: QwtInterval of the colormap
+            stops: color stops of the colormap
+
+        Returns:
+            Color table (list of 256 RGB integers)
+        """
+        if (
+            not interval.isValid()
+            or interval.width() <= 0.0
+            or len(stops) < 2
+            or any(stop.a != 255 for stop in stops)
+        ):
+            return super().colorTable(interval)
+        vmin, vmax, width = interval.minValue(), interval.maxValue(), interval.width()
+        values = vmin + width / 255 * np.arange(256)
+        if self.invert:
+            values = vmax - values + vmin
+        ratios = (values - vmin) / width
+        pos = np.array([stop.pos for stop in stops])
+        rgbs = np.array([stop.rgb for stop in stops], dtype=np.int64)
+        # Index of the stop before each value, as in `QwtLinearColorMap.rgb`
+        index = np.searchsorted(pos, ratios, side="right") - 1
+        if self.mode() == self.FixedColors:
+            table = rgbs[index.clip(0, len(stops) - 1)]
+        else:
+            index = index.clip(0, len(stops) - 2)
+            steps = np.array(
+                [
+                    (s.posStep, s.r0, s.g0, s.b0, s.rStep, s.gStep, s.bStep)
+                    for s in stops
+                ]
+            )[index]
+            inside = (ratios > 0.0) & (ratios < 1.0)
+            if not steps[inside, 0].all():
+                # Stops are being edited (e.g. two stops at the same position)
+                return super().colorTable(interval)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                # (values outside of ]0, 1[ are handled below)
+                ratios1 = (ratios - pos[index]) / steps[:, 0]
+                rgb = steps[:, 1:4] + ratios1[:, np.newaxis] * steps[:, 4:]
+                rgb = rgb.astype(int) & 0xFF
+            table = 0xFF000000 | (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+        table = np.where(ratios <= 0.0, rgbs[0], table)
+        table = np.where(ratios >= 1.0, rgbs[-1], table)
+        return table.tolist()
+
     @property
     def color_stop_values(self) -> list[float]:
         """Returns the position values of the color stops.
@@ -181,13 +259,25 @@ class EditableColormap(QwtLinearColorMap):
                 (1.0, QG.QColor(QC.Qt.GlobalColor.yellow)),
             )
 
-        color_min, color_max = iterable[0][1], iterable[-1][1]
-        colormap = cls(color_min, color_max, name=name)
+        colors = [QG.QColor(color) for _position, color in iterable]
+        colormap = cls(colors[0], colors[-1], name=name)
 
         pos_min, pos_max = iterable[0][0], iterable[-1][0]
-        for position, color in iterable[1:-1]:
-            scaled_position = (position - pos_min) / pos_max
-            colormap.addColorStop(scaled_position, color)
+        positions = [(position - pos_min) / pos_max for position, _c in iterable[1:-1]]
+        if (
+            all(color.alpha() == 255 for color in colors)
+            and all(0.0 <= pos and 1.0 - pos >= 0.001 for pos in positions)
+            and all(pos1 <= pos2 for pos1, pos2 in zip(positions, positions[1:]))
+        ):
+            # Sorted opaque stops (the general case): inserting stops one by one
+            # would give the same result, but all stops may be created at once
+            stops: list[ColorStop] = colormap.colorStops()
+            stops[1:-1] = [ColorStop(p, c) for p, c in zip(positions, colors[1:-1])]
+            for stop, next_stop in zip(stops[:-1], stops[1:]):
+                stop.updateSteps(next_stop)
+        else:
+            for position, color in zip(positions, colors[1:-1]):
+                colormap.addColorStop(position, color)
         return colormap
 
     def to_tuples(self) -> tuple[tuple[float, str], ...]:
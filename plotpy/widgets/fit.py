@@ -46,6 +46,7 @@ Reference
 
 from __future__ import annotations
 
+import math
 from collections.abc import Callable
 from typing import TYPE_CHECKING, Any
 
@@ -63,13 +64,10 @@ from guidata.dataset import (
     update_dataset,
 )
 from guidata.qthelpers import create_groupbox, exec_dialog
-
-# Do not remove this import (used by optimization funcs)
-from numpy import inf  # noqa: F401
 from qtpy import QtCore as QC
 from qtpy import QtWidgets as QW
 from qtpy.QtWidgets import QWidget  # only to help intersphinx find QWidget
-from scipy.optimize import fmin, fmin_bfgs, fmin_cg, fmin_l_bfgs_b, fmin_powell, leastsq
+from scipy.optimize import Bounds, least_squares, minimize
 
 from plotpy.builder import make
 from plotpy.config import _
@@ -80,6 +78,64 @@ if TYPE_CHECKING:
     from plotpy.panels import PanelWidget
 
 
+def vector_norm(vec: np.ndarray, order: float, work: np.ndarray) -> float:
+    """Return the norm of a vector, as `np.linalg.norm(vec, order)` does, without
+    allocating temporary arrays
+
+    Args:
+        vec: vector (1-D array)
+        order: order of the norm (inf is max, -inf is min)
+        work: work array, of the same shape as `vec`
+
+    Returns:
+        Norm of the vector
+    """
+    if order == 2.0:
+        if vec.dtype.kind == "f":
+            # Dot product, without np.linalg.norm's generic argument handling
+            return math.sqrt(np.dot(vec, vec))
+        return np.linalg.norm(vec, order)
+    if order == 0.0:
+        return float(np.count_nonzero(vec))
+    absvec = np.abs(vec, out=work)
+    if order == np.inf:
+        return absvec.max()
+    if order == -np.inf:
+        return absvec.min()
+    if order == 1.0:
+        return absvec.sum()
+    return np.power(absvec, order, out=absvec).sum() ** (1.0 / order)
+
+
+#: Automatic fit methods relying on :py:func:`scipy.optimize.minimize`
+MINIMIZE_METHODS = {
+    "simplex": "Nelder-Mead",
+    "powel": "Powell",
+    "bfgs": "BFGS",
+    "l_bfgs_b": "L-BFGS-B",
+    "cg": "CG",
+}
+
+#: Norm orders which may be entered by name, in addition to numbers
+NORM_ORDERS = {"inf": np.inf, "-inf": -np.inf, "np.inf": np.inf, "-np.inf": -np.inf}
+NORM_REGEXP = r"^\s*([-+]?(np\.)?inf|[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?)\s*$"
+
+
+def parse_norm_order(text: str) -> float:
+    """Return the norm order corresponding to text (e.g. "2", "1.5", "inf")
+
+    Args:
+        text: norm order, as entered in automatic fit parameters
+
+    Returns:
+        Norm order
+    """
+    text = str(text).strip().lower().lstrip("+")
+    if text in NORM_ORDERS:
+        return NORM_ORDERS[text]
+    return float(text)
+
+
 class AutoFitParam(DataSet):
     """Automatic fit parameters"""
 
@@ -99,7 +155,8 @@ class AutoFitParam(DataSet):
     )
     err_norm = StringItem(
         "enorm",
-        default=2.0,
+        default="2.0",
+        regexp=NORM_REGEXP,
         help=_("for simplex, powel, cg and bfgs norm used by the error function"),
     )
     xtol = FloatItem(
@@ -108,11 +165,34 @@ class AutoFitParam(DataSet):
     ftol = FloatItem(
         "ftol", default=0.0001, help=_("for simplex, powel, least squares")
     )
-    gtol = FloatItem("gtol", default=0.0001, help=_("for cg, bfgs"))
+    gtol = FloatItem("gtol", default=0.0001, help=_("for cg, bfgs, l-bfgs-b"))
+    factr = FloatItem(
+        "factr",
+        default=1e7,
+        min=0.0,
+        help=_("for l-bfgs-b (ftol is factr times the machine precision)"),
+    )
+    maxiter = IntItem(
+        "maxiter",
+        default=500,
+        min=1,
+        help=_("maximum number of iterations (of evaluations for least squares)"),
+    )
     norm = StringItem(
-        "norm", default="inf", help=_("for cg, bfgs. inf is max, -inf is min")
+        "norm",
+        default="inf",
+        regexp=NORM_REGEXP,
+        help=_("for cg, bfgs. inf is max, -inf is min"),
     )
 
+    def get_err_norm(self) -> float:
+        """Return the order of the norm used by the error function"""
+        return parse_norm_order(self.err_norm)
+
+    def get_norm(self) -> float:
+        """Return the order of the norm used by cg and bfgs"""
+        return parse_norm_order(self.norm)
+
 
 class FitParamDataSet(DataSet):
     """Fit parameter dataset"""
@@ -284,7 +364,7 @@ class FitParam:
             int_value: integer value
         """
         if self.logscale:
-            total_delta = np.log10(1 + self.max - self.min)
+            total_delta = math.log10(max(1 + self.max - self.min, 1.0))
             self.value = (
                 self.min + 10 ** (total_delta * int_value / (self.steps - 1)) - 1
             )
@@ -296,19 +376,21 @@ class FitParam:
 
     def update_slider_value(self):
         """Update slider value"""
+        parent = self.slider.parent()
+        parent_visible = parent is not None and parent.isVisible()
         if self.value is None or self.min is None or self.max is None:
             self.slider.setEnabled(False)
-            if self.slider.parent() and self.slider.parent().isVisible():
+            if parent_visible:
                 self.slider.show()
         elif self.value == self.min and self.max == self.min:
             self.slider.hide()
         else:
             self.slider.setEnabled(True)
-            if self.slider.parent() and self.slider.parent().isVisible():
+            if parent_visible:
                 self.slider.show()
             if self.logscale:
-                value_delta = max([np.log10(1 + self.value - self.min), 0.0])
-                total_delta = np.log10(1 + self.max - self.min)
+                value_delta = math.log10(max(1 + self.value - self.min, 1.0))
+                total_delta = math.log10(1 + self.max - self.min)
             else:
                 value_delta = self.value - self.min
                 total_delta = self.max - self.min
@@ -408,10 +490,20 @@ class FitWidget(QWidget):
         self.x = None
         self.y = None
         self.fitfunc = None
+        self.jacfunc = None
         self.fitargs = None
         self.fitkwargs = None
         self.fitparams = None
         self.autofit_prm = None
+        # Data within the automatic fit range (views on x and y)
+        # (x, y, x range view, y range view): views are only valid for x and y
+        self.__fit_data: tuple[np.ndarray, ...] | None = None
+        # Last (parameters, residuals) pair evaluated during automatic fit
+        self.__last_error: tuple[np.ndarray, np.ndarray] | None = None
+        self.__memoize_error = False
+        # Last (inputs, parameters, fit function values) computed by `refresh`,
+        # inputs being the fit function, its extra arguments and x data
+        self.__last_yfit: tuple[tuple, tuple[float, ...], np.ndarray] | None = None
 
         self.data_curve = None
         self.fit_curve = None
@@ -491,6 +583,7 @@ class FitWidget(QWidget):
         fitparams: list[FitParam] | None = None,
         fitargs: tuple | None = None,
         fitkwargs: dict | None = None,
+        jacfunc: Callable | None = None,
     ) -> None:
         """Set fit data
 
@@ -501,6 +594,9 @@ class FitWidget(QWidget):
             fitparams: fit parameters. Defaults to None.
             fitargs: fit args. Defaults to None.
             fitkwargs: fit kwargs. Defaults to None.
+            jacfunc: Jacobian of the fit function (same arguments as the fit
+             function, returns an array of shape (len(x), len(params))), used by
+             automatic fit instead of finite differences. Defaults to None.
         """
         if self.fitparams is not None and fitparams is not None:
             self.clear_params_layout()
@@ -508,12 +604,14 @@ class FitWidget(QWidget):
         self.y = y
         if fitfunc is not None:
             self.fitfunc = fitfunc
+            self.jacfunc = jacfunc
         if fitparams is not None:
             self.fitparams = fitparams
         if fitargs is not None:
             self.fitargs = fitargs
         if fitkwargs is not None:
             self.fitkwargs = fitkwargs
+        self.__last_yfit = None
         self.autofit_prm = AutoFitParam(title=_("Automatic fitting options"))
         self.autofit_prm.xmin = x.min()
         self.autofit_prm.xmax = x.max()
@@ -528,6 +626,7 @@ class FitWidget(QWidget):
         fitparams: list[FitParam],
         fitargs: tuple | None = None,
         fitkwargs: dict | None = None,
+        jacfunc: Callable | None = None,
     ) -> None:
         """Set fit data
 
@@ -536,13 +635,17 @@ class FitWidget(QWidget):
             fitparams: fit parameters
             fitargs: fit args. Defaults to None.
             fitkwargs: fit kwargs. Defaults to None.
+            jacfunc: Jacobian of the fit function (see :py:meth:`set_data`).
+             Defaults to None.
         """
         if self.fitparams is not None:
             self.clear_params_layout()
         self.fitfunc = fitfunc
+        self.jacfunc = jacfunc
         self.fitparams = fitparams
         self.fitargs = fitargs
         self.fitkwargs = fitkwargs
+        self.__last_yfit = None
         self.populate_params_layout()
         self.refresh()
 
@@ -594,10 +697,20 @@ class FitWidget(QWidget):
             # Fit widget is not yet configured
             return
 
-        fitargs, fitkwargs = self.get_fitfunc_arguments()
-        yfit = self.fitfunc(
-            self.x, [p.value for p in self.fitparams], *fitargs, **fitkwargs
-        )
+        inputs = (self.fitfunc, self.fitargs, self.fitkwargs, self.x)
+        params = tuple(p.value for p in self.fitparams)
+        last = self.__last_yfit
+        if (
+            last is not None
+            and all(obj is last_obj for obj, last_obj in zip(inputs, last[0]))
+            and last[1] == params
+        ):
+            # Nothing changed: fit function is not evaluated again
+            yfit = last[2]
+        else:
+            fitargs, fitkwargs = self.get_fitfunc_arguments()
+            yfit = self.fitfunc(self.x, list(params), *fitargs, **fitkwargs)
+            self.__last_yfit = (inputs, params, yfit)
 
         plot = self.plot_widget.plot
 
@@ -662,9 +775,23 @@ class FitWidget(QWidget):
             self.compute_imin_imax()
 
     def compute_imin_imax(self) -> None:
-        """Compute i_min and i_max"""
+        """Compute i_min and i_max, and data within the automatic fit range"""
         self.i_min = self.x.searchsorted(self.autofit_prm.xmin)
         self.i_max = self.x.searchsorted(self.autofit_prm.xmax, side="right")
+        self.__fit_data = None
+
+    def __get_fit_data(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return x and y data within the automatic fit range
+
+        Views on data are kept as long as `x` and `y` are the same arrays (they are
+        sliced again if those attributes are assigned new arrays)
+        """
+        x, y = self.x, self.y
+        data = self.__fit_data
+        if data is None or data[0] is not x or data[1] is not y:
+            i_min, i_max = self.i_min, self.i_max
+            data = self.__fit_data = (x, y, x[i_min:i_max], y[i_min:i_max])
+        return data[2], data[3]
 
     def errorfunc(self, params: list[float]) -> np.ndarray:
         """Get error function
@@ -675,34 +802,62 @@ class FitWidget(QWidget):
         Returns:
             Error function
         """
-        x = self.x[self.i_min : self.i_max]
-        y = self.y[self.i_min : self.i_max]
+        if self.__memoize_error:
+            # Optimizers may evaluate the error function several times in a row
+            # with the same parameters: the fit function is evaluated only once
+            last = self.__last_error
+            if last is not None and np.array_equal(last[0], params):
+                return last[1].copy()
         fitargs, fitkwargs = self.get_fitfunc_arguments()
-        return y - self.fitfunc(x, params, *fitargs, **fitkwargs)
+        x, y = self.__get_fit_data()
+        err = y - self.fitfunc(x, params, *fitargs, **fitkwargs)
+        if self.__memoize_error:
+            self.__last_error = (np.array(params, dtype=float), err)
+        return err
+
+    def errorjac(self, params: list[float]) -> np.ndarray:
+        """Get Jacobian of the error function (requires a Jacobian function)
+
+        Args:
+            params: fit parameter values
+
+        Returns:
+            Jacobian of the error function, of shape (len(x), len(params))
+        """
+        fitargs, fitkwargs = self.get_fitfunc_arguments()
+        x, _y = self.__get_fit_data()
+        jac = self.jacfunc(x, params, *fitargs, **fitkwargs)
+        jac = np.asarray(jac, dtype=float)
+        shape = (x.size, len(params))
+        if jac.shape != shape:
+            if jac.shape == shape[:1] and shape[1] == 1:
+                jac = jac.reshape(shape)
+            else:
+                raise ValueError(
+                    f"Jacobian function returned an array of shape {jac.shape}, "
+                    f"expected (len(x), len(params)) = {shape}"
+                )
+        return -jac
 
     def autofit(self) -> None:
         """Autofit"""
         meth = self.autofit_prm.method
         x0 = np.array([p.value for p in self.fitparams])
-        if meth == "lq":
-            x = self.autofit_lq(x0)
-        elif meth == "simplex":
-            x = self.autofit_simplex(x0)
-        elif meth == "powel":
-            x = self.autofit_powel(x0)
-        elif meth == "bfgs":
-            x = self.autofit_bfgs(x0)
-        elif meth == "l_bfgs_b":
-            x = self.autofit_l_bfgs(x0)
-        elif meth == "cg":
-            x = self.autofit_cg(x0)
-        else:
-            return
+        self.__memoize_error = True
+        try:
+            if meth == "lq":
+                x = self.autofit_lq(x0)
+            elif meth in MINIMIZE_METHODS:
+                x = self.autofit_minimize(x0, meth)
+            else:
+                return
+        finally:
+            self.__memoize_error = False
+            self.__last_error = None
         for v, p in zip(x, self.fitparams):
             p.value = v
+            p.update(refresh=False)
         self.refresh()
-        for prm in self.fitparams:
-            prm.update()
 
     def get_norm_func(self) -> Callable:
         """Get norm function
@@ -710,95 +865,112 @@ class FitWidget(QWidget):
         Returns:
             Norm function
         """
-        prm = self.autofit_prm
-        err_norm = eval(prm.err_norm)
+        err_norm = self.autofit_prm.get_err_norm()
+        # Work array, allocated once for all evaluations of the norm function
+        work = np.empty(self.__get_fit_data()[1].shape)
+        # Bound once: the norm function is evaluated many times during autofit
+        errorfunc, norm = self.errorfunc, np.linalg.norm
 
         def func(params):
-            """
+            """Norm of the error function
 
-            :param params:
-            :return:
+            Args:
+                params: fit parameter values
+
+            Returns:
+                Norm of the error function
             """
-            err = np.linalg.norm(self.errorfunc(params), err_norm)
-            return err
+            err = errorfunc(params)
+            if err.shape != work.shape:
+                # Fit function result was broadcast to another shape
+                return norm(err, err_norm)
+            return vector_norm(err, err_norm, work)
 
         return func
 
-    def autofit_simplex(self, x0: np.ndarray) -> np.ndarray:
-        """Autofit using simplex
-
-        Args:
-            x0: initial value
+    def get_norm_grad_func(self) -> Callable | None:
+        """Get gradient of the norm function
 
         Returns:
-            Fitted values
-        """
-        prm = self.autofit_prm
-
-        x = fmin(self.get_norm_func(), x0, xtol=prm.xtol, ftol=prm.ftol)
-        return x
-
-    def autofit_powel(self, x0: np.ndarray) -> np.ndarray:
-        """Autofit using Powell
-
-        Args:
-            x0: initial value
-
-        Returns:
-            Fitted values
+            Gradient function, or None if no Jacobian function has been set or if
+            the norm is not differentiable (norm order is not finite or lower than 1)
         """
-        prm = self.autofit_prm
-
-        x = fmin_powell(self.get_norm_func(), x0, xtol=prm.xtol, ftol=prm.ftol)
-        return x
+        err_norm = self.autofit_prm.get_err_norm()
+        if self.jacfunc is None or not 1.0 <= err_norm < np.inf:
+            return None
+        errorfunc, errorjac = self.errorfunc, self.errorjac
 
-    def autofit_bfgs(self, x0: np.ndarray) -> np.ndarray:
-        """Autofit using BFGS
+        def grad(params):
+            """Gradient of the norm of the error function
 
-        Args:
-            x0: initial value
+            Args:
+                params: fit parameter values
 
-        Returns:
-            Fitted values
-        """
-        prm = self.autofit_prm
+            Returns:
+                Gradient of the norm of the error function
+            """
+            err = errorfunc(params)
+            norm = np.linalg.norm(err, err_norm)
+            if norm == 0.0:
+                return np.zeros(len(params))
+            if err_norm == 2.0:
+                weights = err / norm
+            else:
+                weights = np.sign(err) * (np.abs(err) / norm) ** (err_norm - 1.0)
+            return weights @ errorjac(params)
 
-        x = fmin_bfgs(self.get_norm_func(), x0, gtol=prm.gtol, norm=eval(prm.norm))
-        return x
+        return grad
 
-    def autofit_l_bfgs(self, x0: np.ndarray) -> np.ndarray:
-        """Autofit using L-BFGS-B
+    def autofit_minimize(self, x0: np.ndarray, method: str) -> np.ndarray:
+        """Autofit using :py:func:`scipy.optimize.minimize`
 
         Args:
             x0: initial value
+            method: automatic fit method (a key of `MINIMIZE_METHODS`)
 
         Returns:
             Fitted values
         """
         prm = self.autofit_prm
-        bounds = [(p.min, p.max) for p in self.fitparams]
-
-        x, _f, _d = fmin_l_bfgs_b(
-            self.get_norm_func(), x0, pgtol=prm.gtol, approx_grad=1, bounds=bounds
+        scipy_method = MINIMIZE_METHODS[method]
+        jac = bounds = None
+        options = {"maxiter": prm.maxiter}
+        if scipy_method == "Nelder-Mead":
+            options.update(xatol=prm.xtol, fatol=prm.ftol)
+        elif scipy_method == "Powell":
+            options.update(xtol=prm.xtol, ftol=prm.ftol)
+        else:
+            jac = self.get_norm_grad_func()
+            options["gtol"] = prm.gtol
+            if scipy_method == "L-BFGS-B":
+                bounds = Bounds(*self.get_bounds())
+                x0 = np.clip(x0, bounds.lb, bounds.ub)
+                options["ftol"] = prm.factr * np.finfo(float).eps
+            else:
+                options["norm"] = prm.get_norm()
+        result = minimize(
+            self.get_norm_func(),
+            x0,
+            method=scipy_method,
+            jac=jac,
+            bounds=bounds,
+            options=options,
         )
-        return x
-
-    def autofit_cg(self, x0: np.ndarray) -> np.ndarray:
-        """Autofit using conjugate gradient
+        return result.x
 
-        Args:
-            x0: initial value
+    def get_bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get fit parameter bounds
 
         Returns:
-            Fitted values
+            Lower and upper bounds (-inf and inf when parameter bounds are not set)
         """
-        prm = self.autofit_prm
-
-        x = fmin_cg(self.get_norm_func(), x0, gtol=prm.gtol, norm=eval(prm.norm))
-        return x
+        lower = [-np.inf if p.min is None else p.min for p in self.fitparams]
+        upper = [np.inf if p.max is None else p.max for p in self.fitparams]
+        return np.array(lower, dtype=float), np.array(upper, dtype=float)
 
     def autofit_lq(self, x0: np.ndarray) -> np.ndarray:
-        """Autofit using leastsq
+        """Autofit using least squares (Trust Region Reflective algorithm, within
+        fit parameter bounds)
 
         Args:
             x0: initial value
@@ -807,20 +979,51 @@ class FitWidget(QWidget):
             Fitted values
         """
         prm = self.autofit_prm
-
-        def func(params: list[float]) -> np.ndarray:
+        lower, upper = self.get_bounds()
+        x = np.clip(x0, lower, upper)
+        # Parameters with equal bounds are fixed: only the others are fitted
+        free = lower < upper
+        if not free.any():
+            return x
+
+        def func(free_params: np.ndarray) -> np.ndarray:
             """Error function
 
             Args:
-                params: fit parameter values
+                free_params: values of the fitted parameters
 
             Returns:
                 Error function
             """
-            err = self.errorfunc(params)
-            return err
-
-        x, _ier = leastsq(func, x0, xtol=prm.xtol, ftol=prm.ftol)
+            x[free] = free_params
+            return self.errorfunc(x)
+
+        jac = "2-point"
+        if self.jacfunc is not None:
+
+            def jac(free_params: np.ndarray) -> np.ndarray:
+                """Jacobian of the error function
+
+                Args:
+                    free_params: values of the fitted parameters
+
+                Returns:
+                    Jacobian of the error function
+                """
+                x[free] = free_params
+                return self.errorjac(x)[:, free]
+
+        result = least_squares(
+            func,
+            x[free],
+            jac=jac,
+            method="trf",
+            bounds=(lower[free], upper[free]),
+            xtol=prm.xtol,
+            ftol=prm.ftol,
+            max_nfev=prm.maxiter,
+        )
+        x[free] = result.x
         return x
 
     def get_values(self) -> list[float]:
@@ -894,6 +1097,7 @@ class FitDialog(PlotDialog):
         fitparams: list[FitParam] | None = None,
         fitargs: tuple | None = None,
         fitkwargs: dict | None = None,
+        jacfunc: Callable | None = None,
     ) -> None:
         """Set fit data
 
@@ -904,8 +1108,13 @@ class FitDialog(PlotDialog):
             fitparams: fit parameters. Defaults to None.
             fitargs: fit args. Defaults to None.
             fitkwargs: fit kwargs. Defaults to None.
+            jacfunc: Jacobian of the fit function (same arguments as the fit
+             function, returns an array of shape (len(x), len(params))), used by
+             automatic fit instead of finite differences. Defaults to None.
         """
-        self.fit_widget.set_data(x, y, fitfunc, fitparams, fitargs, fitkwargs)
+        self.fit_widget.set_data(
+            x, y, fitfunc, fitparams, fitargs, fitkwargs, jacfunc=jacfunc
+        )
 
     def get_values(self) -> list[float]:
         """Returns fit parameter values
@@ -935,6 +1144,7 @@ def guifit(
     auto_fit: bool = True,
     winsize: tuple[int, int] | None = None,
     winpos: tuple[int, int] | None = None,
+    jacfunc: Callable | None = None,
 ) -> list[float] | None:
     """GUI-based curve fitting tool
 
@@ -953,6 +1163,8 @@ def guifit(
         auto_fit: auto fit. Defaults to True.
         winsize (tuple[int, int] | None): window size. Defaults to None.
         winpos (tuple[int, int] | None): window position. Defaults to None.
+        jacfunc: Jacobian of the fit function (same arguments as the fit function,
+         returns an array of shape (len(x), len(params))). Defaults to None.
 
     Returns:
         Fit parameter values or None if the user cancels the dialog
@@ -966,7 +1178,7 @@ def guifit(
         auto_fit=auto_fit,
         options=PlotOptions(title=title, xlabel=xlabel, ylabel=ylabel, type="curve"),
     )
-    win.set_data(x, y, fitfunc, fitparams, fitargs, fitkwargs)
+    win.set_data(x, y, fitfunc, fitparams, fitargs, fitkwargs, jacfunc=jacfunc)
     if winsize is not None:
         win.resize(*winsize)
     if winpos is not None: